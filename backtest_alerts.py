@@ -0,0 +1,116 @@
+"""
+提醒规则回测：用本地保存的分时历史（history/）统计规则在过去若干个交易日的触发情况
+
+用法:
+  python backtest_alerts.py                                   回测 alerts.json 中的全部规则
+  python backtest_alerts.py 600519 --above 1800               价格高于 1800
+  python backtest_alerts.py 600519 --change-below 3 --rearm-pct 1
+  python backtest_alerts.py 600519 --expr "price > ma20 * 1.02 and volume_z > 3"
+选项:
+  --days N            回测最近 N 个交易日（默认 20）
+  --rearm-pct X       触发后回撤 X（价格 %，涨跌幅为百分点）重新启用
+  --rearm-minutes T   触发后 T 分钟重新启用
+  --detail            逐条列出触发时间
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Ensure we can import from core
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from core.alert_manager import AlertRule, AlertType
+from core.alert_expr import ExpressionError
+from core.backtest import backtest_rules
+from core.history_store import HistoryStore
+
+_TYPE_OPTIONS = (
+    ("above", AlertType.PRICE_ABOVE),
+    ("below", AlertType.PRICE_BELOW),
+    ("change_above", AlertType.CHANGE_ABOVE),
+    ("change_below", AlertType.CHANGE_BELOW),
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="提醒规则回测")
+    parser.add_argument("code", nargs="?", help="股票代码；省略时回测 alerts.json 中的全部规则")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--above", type=float, help="价格高于")
+    group.add_argument("--below", type=float, help="价格低于")
+    group.add_argument("--change-above", type=float, help="涨幅超过（%%）")
+    group.add_argument("--change-below", type=float, help="跌幅超过（%%）")
+    group.add_argument("--expr", help="提醒表达式")
+    parser.add_argument("--days", type=int, default=20, help="回测最近 N 个交易日")
+    parser.add_argument("--rearm-pct", type=float, default=0.0)
+    parser.add_argument("--rearm-minutes", type=int, default=0)
+    parser.add_argument("--history", default=os.path.join(current_dir, "history"), help="分时历史目录")
+    parser.add_argument("--alerts", default=os.path.join(current_dir, "alerts.json"), help="规则文件")
+    parser.add_argument("--detail", action="store_true", help="列出每次触发的时间")
+    return parser.parse_args()
+
+
+def build_rules(args):
+    if args.code is None:
+        if not os.path.exists(args.alerts):
+            sys.exit(f"找不到规则文件 {args.alerts}")
+        with open(args.alerts, "r", encoding="utf-8") as f:
+            return [AlertRule.from_dict(r) for r in json.load(f).get("rules", [])]
+
+    rearm = {"rearm_pct": args.rearm_pct, "rearm_minutes": args.rearm_minutes}
+    if args.expr:
+        return [AlertRule(args.code, AlertType.EXPRESSION, 0, expression=args.expr, **rearm)]
+    for option, alert_type in _TYPE_OPTIONS:
+        threshold = getattr(args, option)
+        if threshold is not None:
+            return [AlertRule(args.code, alert_type, threshold, **rearm)]
+    sys.exit("请指定 --above / --below / --change-above / --change-below / --expr 之一")
+
+
+def describe(rule):
+    if rule.alert_type == AlertType.EXPRESSION:
+        text = f"{rule.code} 表达式 {rule.expression}"
+    else:
+        text = f"{rule.code} {rule.alert_type.value} {rule.threshold}"
+    if rule.rearm_pct > 0:
+        text += f" 回撤{rule.rearm_pct:g}恢复"
+    if rule.rearm_minutes > 0:
+        text += f" {rule.rearm_minutes}分钟恢复"
+    return text
+
+
+def main():
+    args = parse_args()
+    rules = build_rules(args)
+    if not rules:
+        print("没有可回测的规则")
+        return
+
+    start = time.perf_counter()
+    try:
+        results = backtest_rules(rules, HistoryStore(args.history), days=args.days)
+    except ExpressionError as e:
+        sys.exit(f"表达式无效: {e}")
+    elapsed = time.perf_counter() - start
+
+    print("-" * 50)
+    for result in results:
+        days = len(result.days)
+        if not days:
+            print(f"{describe(result.rule)}: 没有分时历史")
+            continue
+        active = sum(1 for count in result.per_day().values() if count)
+        print(f"{describe(result.rule)}: {days} 个交易日共触发 {result.count} 次，"
+              f"有触发的交易日 {active} 个")
+        if args.detail:
+            for day, minute in result.fires:
+                print(f"    {day} {minute}")
+    print("-" * 50)
+    print(f"规则 {len(rules)} 条，耗时 {elapsed:.2f} 秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+提醒引擎基准测试：500 只股票、10000 条规则下单轮 check_alerts 的耗时
+
+用法: python bench_alerts.py [规则数] [股票数] [轮数]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Ensure we can import from core
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from core.alert_manager import AlertManager, AlertRule, AlertType
+
+
+class _MemoryConfig:
+    """不写盘的配置"""
+
+    def __init__(self):
+        self.config_file = "config.json"
+        self.data = {}
+
+    def save(self):
+        pass
+
+
+def make_quotes(codes, prices, rng):
+    quotes = {}
+    for code in codes:
+        prices[code] *= 1 + rng.uniform(-0.004, 0.004)
+        price = prices[code]
+        ratio = (price / 100 - 1) * 100
+        quotes[code] = {"code": code, "name": code, "price": f"{price:.2f}", "ratio": f"{ratio:+.2f}%"}
+    return quotes
+
+
+def main():
+    rule_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    code_count = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    rounds = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    rng = random.Random(42)
+    codes = [f"{600000 + i}" for i in range(code_count)]
+    manager = AlertManager(_MemoryConfig(), alerts_file=os.path.join(tempfile.mkdtemp(), "alerts.json"))
+
+    start = time.perf_counter()
+    # 只生成四类阈值规则：表达式规则需要分时数据，不在本基准范围内
+    types = [t for t in AlertType if t != AlertType.EXPRESSION]
+    for _ in range(rule_count):
+        alert_type = rng.choice(types)
+        if alert_type in (AlertType.PRICE_ABOVE, AlertType.PRICE_BELOW):
+            threshold = round(100 * (1 + rng.uniform(0.02, 0.15) * (1 if alert_type == AlertType.PRICE_ABOVE else -1)), 2)
+        else:
+            threshold = round(rng.uniform(2, 10), 2)
+        manager.rules.append(AlertRule(code=rng.choice(codes), alert_type=alert_type, threshold=threshold))
+    manager._rebuild_index()
+    build_ms = (time.perf_counter() - start) * 1000
+
+    prices = {code: 100.0 for code in codes}
+    fired = 0
+    timings = []
+    for _ in range(rounds):
+        quotes = make_quotes(codes, prices, rng)
+        start = time.perf_counter()
+        fired += len(manager.check_alerts(quotes))
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    print("-" * 50)
+    print(f"规则 {rule_count} 条 / 股票 {code_count} 只 / {rounds} 轮")
+    print(f"建立索引: {build_ms:.1f} ms")
+    print(f"单轮耗时: 中位数 {timings[len(timings) // 2]:.3f} ms, "
+          f"P95 {timings[int(len(timings) * 0.95)]:.3f} ms, 最大 {timings[-1]:.3f} ms")
+    print(f"共触发 {fired} 条")
+    print("-" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""
+提醒表达式
+例: price > avg_price * 1.02 and volume_1m > 3 * mean(volume_1m, 20)
+
+表达式只在添加规则时解析一次：用 ast 校验语法后编译成闭包树。
+相同的子表达式（按语法树判断）在所有规则、所有股票间共用同一个闭包，
+求值时每只股票每轮行情只计算一次，结果缓存在该股票的上下文里。
+"""
+import ast
+import logging
+import operator
+from functools import lru_cache
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from core.movers import parse_ratio
+from core.indicators import INDICATOR_FIELDS
+
+logger = logging.getLogger(__name__)
+
+
+class ExpressionError(ValueError):
+    """表达式语法或名称错误"""
+
+
+# 分时序列变量 -> 分时点字段；单独使用时取最新一分钟的值，在窗口函数中取最近 n 分钟
+SERIES_FIELDS = {
+    "price": "price",
+    "avg_price": "avg_price",
+    "ratio": "change_pct",
+    "volume_1m": "volume",
+    "amount_1m": "amount",
+}
+
+# 只有快照值的变量 -> 行情字段（接口给出的是字符串，按 parse_number 解析）
+SCALAR_FIELDS = {
+    "open": "open",
+    "high": "high",
+    "low": "low",
+    "pre_close": "preClose",
+    "volume": "volume",
+    "turnover": "turnover",
+}
+
+# 数值后缀单位 -> 倍数
+_UNIT_SCALES = {"万": 1e4, "亿": 1e8}
+
+# 另有流式指标变量 ma5 / ma20 / vwap / rsi / volatility / volume_z（见 core.indicators），
+# 当天数据不足以计算时视为不满足
+
+# 窗口函数: name(序列变量, 分钟数)
+WINDOW_FUNCS = {
+    "mean": np.mean,
+    "max": np.max,
+    "min": np.min,
+    "sum": np.sum,
+    "std": np.std,
+}
+
+# 普通函数
+SCALAR_FUNCS = {
+    "abs": abs,
+}
+
+_BIN_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+}
+
+_COMPARE_OPS = {
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+}
+
+
+def parse_number(value) -> float:
+    """
+    解析行情接口的数值字段：去掉 % / 逗号 / 正号 / 手、股、元，万、亿换算成倍数
+    如 "1.23%" -> 1.23，"12.5万手" -> 125000；"--"、空值等无法解析时抛出 ValueError
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().replace(",", "").replace("%", "").replace("+", "")
+    text = text.rstrip("手股元")
+    scale = _UNIT_SCALES.get(text[-1:], 1.0)
+    if scale != 1.0:
+        text = text[:-1]
+    return float(text) * scale
+
+
+class ExpressionContext:
+    """
+    一只股票在一轮行情中的求值上下文
+    变量和序列按需解析，子表达式结果按闭包缓存，同一只股票的所有规则共用。
+    """
+
+    __slots__ = ("info", "points", "indicators", "memo", "_series")
+
+    def __init__(self, info: dict, indicators: Optional[dict] = None):
+        self.info = info
+        self.indicators = indicators or {}
+        self.points = info.get("points") or []
+        self.memo: Dict[int, object] = {}
+        self._series: Dict[str, np.ndarray] = {}
+
+    def series(self, name: str) -> np.ndarray:
+        values = self._series.get(name)
+        if values is None:
+            field = SERIES_FIELDS[name]
+            values = np.fromiter((p.get(field, 0) for p in self.points), dtype=float, count=len(self.points))
+            self._series[name] = values
+        return values
+
+    def variable(self, name: str) -> float:
+        if name == "price":
+            return float(self.info.get("price", 0))
+        if name == "ratio":
+            return parse_ratio(self.info.get("ratio", "0%"))
+        if name in SERIES_FIELDS:
+            if not self.points:
+                raise ValueError(f"no minute data for {name}")
+            return float(self.points[-1].get(SERIES_FIELDS[name], 0))
+        if name in INDICATOR_FIELDS:
+            value = self.indicators.get(name)
+            if value is None:
+                raise ValueError(f"indicator {name} not ready")
+            return value
+        return parse_number(self.info.get(SCALAR_FIELDS[name], "--"))
+
+
+class CompiledExpression:
+    """编译后的表达式，evaluate(ctx) 返回是否满足"""
+
+    __slots__ = ("source", "_fn")
+
+    def __init__(self, source: str, fn: Callable):
+        self.source = source
+        self._fn = fn
+
+    def evaluate(self, ctx: ExpressionContext) -> bool:
+        try:
+            return bool(self._fn(ctx))
+        except (ValueError, TypeError, ZeroDivisionError, ArithmeticError) as e:
+            # 数据缺失（如停牌价格为 "--"、没有分时点）时视为不满足
+            logger.debug(f"Expression '{self.source}' not evaluated: {e}")
+            return False
+
+
+# 语法树 dump -> 闭包，所有规则共用
+_node_cache: Dict[str, Callable] = {}
+
+
+def _memoized(fn: Callable) -> Callable:
+    """同一上下文内只计算一次"""
+    key = id(fn)
+
+    def cached(ctx):
+        memo = ctx.memo
+        if key in memo:
+            return memo[key]
+        value = memo[key] = fn(ctx)
+        return value
+    return cached
+
+
+def _compile_node(node: ast.AST) -> Callable:
+    key = ast.dump(node)
+    fn = _node_cache.get(key)
+    if fn is None:
+        fn = _build_node(node)
+        _node_cache[key] = fn
+    return fn
+
+
+def _build_node(node: ast.AST) -> Callable:
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise ExpressionError(f"不支持的常量: {node.value!r}")
+        value = float(node.value)
+        return lambda ctx: value
+
+    if isinstance(node, ast.Name):
+        name = node.id
+        if name not in SERIES_FIELDS and name not in SCALAR_FIELDS and name not in INDICATOR_FIELDS:
+            raise ExpressionError(f"未知变量: {name}")
+        return lambda ctx: ctx.variable(name)
+
+    if isinstance(node, ast.UnaryOp):
+        operand = _compile_node(node.operand)
+        if isinstance(node.op, ast.USub):
+            return lambda ctx: -operand(ctx)
+        if isinstance(node.op, ast.UAdd):
+            return operand
+        if isinstance(node.op, ast.Not):
+            return lambda ctx: not operand(ctx)
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _BIN_OPS:
+        op = _BIN_OPS[type(node.op)]
+        left, right = _compile_node(node.left), _compile_node(node.right)
+        return _memoized(lambda ctx: op(left(ctx), right(ctx)))
+
+    if isinstance(node, ast.BoolOp):
+        parts = [_compile_node(v) for v in node.values]
+        if isinstance(node.op, ast.And):
+            return lambda ctx: all(part(ctx) for part in parts)
+        return lambda ctx: any(part(ctx) for part in parts)
+
+    if isinstance(node, ast.Compare):
+        if not all(type(op) in _COMPARE_OPS for op in node.ops):
+            raise ExpressionError("不支持的比较运算")
+        operands = [_compile_node(node.left)] + [_compile_node(c) for c in node.comparators]
+        ops = [_COMPARE_OPS[type(op)] for op in node.ops]
+
+        def compare(ctx):
+            left = operands[0](ctx)
+            for op, operand in zip(ops, operands[1:]):
+                right = operand(ctx)
+                if not op(left, right):
+                    return False
+                left = right
+            return True
+        return _memoized(compare)
+
+    if isinstance(node, ast.Call):
+        return _build_call(node)
+
+    raise ExpressionError(f"不支持的语法: {type(node).__name__}")
+
+
+def _build_call(node: ast.Call) -> Callable:
+    if not isinstance(node.func, ast.Name) or node.keywords:
+        raise ExpressionError("只支持直接调用内置函数")
+    name = node.func.id
+    args = node.args
+
+    # 窗口函数: mean(volume_1m, 20) —— 最近 20 分钟（含当前分钟）
+    if (name in WINDOW_FUNCS and len(args) == 2 and isinstance(args[0], ast.Name)
+            and args[0].id in SERIES_FIELDS):
+        series_name = args[0].id
+        if not isinstance(args[1], ast.Constant) or not isinstance(args[1].value, int) or args[1].value <= 0:
+            raise ExpressionError(f"{name}() 的窗口长度必须是正整数")
+        window = args[1].value
+        func = WINDOW_FUNCS[name]
+
+        def window_call(ctx):
+            values = ctx.series(series_name)[-window:]
+            if values.size == 0:
+                raise ValueError(f"no minute data for {series_name}")
+            return float(func(values))
+        return _memoized(window_call)
+
+    if name in SCALAR_FUNCS and args:
+        func = SCALAR_FUNCS[name]
+        compiled = [_compile_node(a) for a in args]
+        return _memoized(lambda ctx: func(*(c(ctx) for c in compiled)))
+
+    if name in WINDOW_FUNCS:
+        raise ExpressionError(f"{name}() 用法: {name}(序列变量, 分钟数)，序列变量为 {', '.join(SERIES_FIELDS)}")
+    raise ExpressionError(f"未知函数: {name}")
+
+
+@lru_cache(maxsize=None)
+def compile_expression(source: str) -> CompiledExpression:
+    """解析并编译表达式，相同文本只编译一次；语法错误抛出 ExpressionError"""
+    text = source.strip()
+    if not text:
+        raise ExpressionError("表达式为空")
+    try:
+        tree = ast.parse(text, mode="eval")
+    except SyntaxError as e:
+        raise ExpressionError(f"语法错误: {e.msg}") from None
+    return CompiledExpression(text, _compile_node(tree.body))
+
+
+def validate_expression(source: str) -> Optional[str]:
+    """校验表达式，返回错误信息；合法时返回 None"""
+    try:
+        compile_expression(source)
+    except ExpressionError as e:
+        return str(e)
+    return None
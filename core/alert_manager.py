@@ -1,11 +1,22 @@
 """
 价格提醒管理器
 """
+import bisect
+import heapq
+import itertools
+import json
 import logging
+import os
+import time
+from threading import Lock
 from typing import Dict, List, Optional
 from dataclasses import dataclass
 from enum import Enum
 
+from core.movers import parse_ratio
+from core.alert_expr import ExpressionContext, ExpressionError, compile_expression
+from core.json_writer import DebouncedJsonWriter, atomic_write_json
+
 logger = logging.getLogger(__name__)
 
 
@@ -15,6 +26,7 @@ class AlertType(Enum):
     PRICE_BELOW = "price_below"  # 价格低于
     CHANGE_ABOVE = "change_above"  # 涨幅超过
     CHANGE_BELOW = "change_below"  # 跌幅超过
+    EXPRESSION = "expression"  # 自定义表达式
 
 
 @dataclass
@@ -25,6 +37,15 @@ class AlertRule:
     threshold: float  # 阈值
     enabled: bool = True
     triggered: bool = False  # 是否已触发（避免重复提醒）
+    triggered_at: str = ""  # 触发（越过阈值）的分钟，如 "10:23"
+    expression: str = ""  # EXPRESSION 类型的表达式文本
+    triggered_ts: int = 0  # 触发分钟的时间戳
+    rearm_pct: float = 0.0  # 触发后回撤多少自动重新启用（价格类为 %，涨跌幅类为百分点），0 表示不启用
+    rearm_minutes: int = 0  # 触发后多少分钟自动重新启用，0 表示不启用
+    
+    @property
+    def auto_rearm(self) -> bool:
+        return self.rearm_pct > 0 or self.rearm_minutes > 0
     
     def to_dict(self) -> dict:
         return {
@@ -32,7 +53,12 @@ class AlertRule:
             "alert_type": self.alert_type.value,
             "threshold": self.threshold,
             "enabled": self.enabled,
-            "triggered": self.triggered
+            "triggered": self.triggered,
+            "triggered_at": self.triggered_at,
+            "expression": self.expression,
+            "triggered_ts": self.triggered_ts,
+            "rearm_pct": self.rearm_pct,
+            "rearm_minutes": self.rearm_minutes
         }
     
     @classmethod
@@ -42,90 +68,491 @@ class AlertRule:
             alert_type=AlertType(data["alert_type"]),
             threshold=data["threshold"],
             enabled=data.get("enabled", True),
-            triggered=data.get("triggered", False)
+            triggered=data.get("triggered", False),
+            triggered_at=data.get("triggered_at", ""),
+            expression=data.get("expression", ""),
+            triggered_ts=data.get("triggered_ts", 0),
+            rearm_pct=data.get("rearm_pct", 0.0),
+            rearm_minutes=data.get("rearm_minutes", 0)
         )
 
 
+class _ThresholdIndex:
+    """
+    一组按阈值升序排列的待触发规则（阈值与规则两个平行列表）
+    向上突破类规则在 值 >= 阈值 时触发，触发的总是有序列表的前缀；
+    向下跌破类规则在 值 <= 阈值 时触发，触发的总是后缀。
+    已触发的规则会被移出索引，所以每轮只需二分出这一段切片，不再逐条比较。
+    """
+
+    __slots__ = ("thresholds", "rules")
+
+    def __init__(self):
+        self.thresholds: List[float] = []
+        self.rules: List[AlertRule] = []
+
+    def __len__(self):
+        return len(self.rules)
+
+    def add(self, threshold: float, rule: AlertRule):
+        i = bisect.bisect_right(self.thresholds, threshold)
+        self.thresholds.insert(i, threshold)
+        self.rules.insert(i, rule)
+
+    def remove(self, threshold: float, rule: AlertRule):
+        i = bisect.bisect_left(self.thresholds, threshold)
+        while i < len(self.rules) and self.thresholds[i] == threshold:
+            if self.rules[i] is rule:
+                del self.thresholds[i]
+                del self.rules[i]
+                return
+            i += 1
+
+    def pop_at_or_below(self, value: float) -> List[AlertRule]:
+        """取出所有 阈值 <= value 的规则（前缀）"""
+        i = bisect.bisect_right(self.thresholds, value)
+        if i == 0:
+            return []
+        fired = self.rules[:i]
+        del self.thresholds[:i]
+        del self.rules[:i]
+        return fired
+
+    def pop_at_or_above(self, value: float) -> List[AlertRule]:
+        """取出所有 阈值 >= value 的规则（后缀）"""
+        i = bisect.bisect_left(self.thresholds, value)
+        if i == len(self.thresholds):
+            return []
+        fired = self.rules[i:]
+        del self.thresholds[i:]
+        del self.rules[i:]
+        return fired
+
+
+class _CodeIndex:
+    """
+    单只股票的待触发规则，按 价格/涨跌幅 × 向上/向下 分成四组；
+    表达式规则单独保存（编译结果, 规则）
+    """
+
+    __slots__ = ("price_above", "price_below", "ratio_above", "ratio_below", "expressions")
+
+    def __init__(self):
+        self.price_above = _ThresholdIndex()
+        self.price_below = _ThresholdIndex()
+        self.ratio_above = _ThresholdIndex()
+        self.ratio_below = _ThresholdIndex()
+        self.expressions = []
+
+    def __len__(self):
+        return (len(self.price_above) + len(self.price_below) + len(self.ratio_above)
+                + len(self.ratio_below) + len(self.expressions))
+
+    def add(self, rule: AlertRule):
+        if rule.alert_type == AlertType.EXPRESSION:
+            try:
+                self.expressions.append((compile_expression(rule.expression), rule))
+            except ExpressionError as e:
+                logger.error(f"[{rule.code}] 提醒表达式无效，已忽略: {rule.expression} ({e})")
+            return
+        if rule.alert_type == AlertType.PRICE_ABOVE:
+            self.price_above.add(rule.threshold, rule)
+        elif rule.alert_type == AlertType.PRICE_BELOW:
+            self.price_below.add(rule.threshold, rule)
+        elif rule.alert_type == AlertType.CHANGE_ABOVE:
+            self.ratio_above.add(rule.threshold, rule)
+        elif rule.alert_type == AlertType.CHANGE_BELOW:
+            # 跌幅阈值按正数填写，比较时取负
+            self.ratio_below.add(-abs(rule.threshold), rule)
+
+    def _rearm_slot(self, rule: AlertRule):
+        """已触发规则的回撤位置：放入反方向的组，价格回撤越过该位置时被 pop_triggered 取出"""
+        pct = rule.rearm_pct
+        if rule.alert_type == AlertType.PRICE_ABOVE:
+            return self.price_below, rule.threshold * (1 - pct / 100)
+        if rule.alert_type == AlertType.PRICE_BELOW:
+            return self.price_above, rule.threshold * (1 + pct / 100)
+        if rule.alert_type == AlertType.CHANGE_ABOVE:
+            return self.ratio_below, rule.threshold - pct
+        if rule.alert_type == AlertType.CHANGE_BELOW:
+            return self.ratio_above, -abs(rule.threshold) + pct
+        return None, None
+
+    def add_rearm(self, rule: AlertRule) -> bool:
+        index, level = self._rearm_slot(rule)
+        if index is None:
+            return False
+        index.add(level, rule)
+        return True
+
+    def discard_rearm(self, rule: AlertRule):
+        index, level = self._rearm_slot(rule)
+        if index is not None:
+            index.remove(level, rule)
+
+    def pop_triggered(self, price_low: float, price_high: float,
+                      ratio_low: float, ratio_high: float) -> List[AlertRule]:
+        """按本轮区间的最高/最低值取出所有被越过的规则"""
+        return (self.price_above.pop_at_or_below(price_high) + self.price_below.pop_at_or_above(price_low)
+                + self.ratio_above.pop_at_or_below(ratio_high) + self.ratio_below.pop_at_or_above(ratio_low))
+
+    def pop_expressions(self, ctx: ExpressionContext) -> List[AlertRule]:
+        """对这只股票的全部表达式求值，子表达式结果在 ctx 中共用"""
+        fired = [rule for compiled, rule in self.expressions if compiled.evaluate(ctx)]
+        if fired:
+            fired_ids = {id(rule) for rule in fired}
+            self.expressions = [(c, r) for c, r in self.expressions if id(r) not in fired_ids]
+        return fired
+
+
+class _RearmIndex:
+    """
+    单只股票已触发、等待自动重新启用的规则
+    - 回撤条件：复用 _CodeIndex 的四组有序阈值，按回撤位置放在反方向，每轮同样只做二分
+    - 时间条件：按到期时间排列的小顶堆，每轮只看堆顶
+    两个条件先满足者生效；另一侧残留的条目按序号识别为过期。
+    """
+
+    __slots__ = ("levels", "due", "_waiting", "_seq")
+
+    def __init__(self):
+        self.levels = _CodeIndex()
+        self.due = []  # (到期时间戳, 序号, 规则)
+        self._waiting: Dict[int, int] = {}  # id(rule) -> 序号
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._waiting)
+
+    def add(self, rule: AlertRule):
+        seq = next(self._seq)
+        waiting = False
+        if rule.rearm_pct > 0:
+            waiting = self.levels.add_rearm(rule)
+        if rule.rearm_minutes > 0:
+            heapq.heappush(self.due, (rule.triggered_ts + rule.rearm_minutes * 60, seq, rule))
+            waiting = True
+        if waiting:
+            self._waiting[id(rule)] = seq
+
+    def pop_rearmed(self, window: "_PollWindow") -> List[AlertRule]:
+        rearmed = []
+        for rule in self.levels.pop_triggered(window.price_low, window.price_high,
+                                              window.ratio_low, window.ratio_high):
+            if self._waiting.pop(id(rule), None) is not None:
+                rearmed.append(rule)
+        now = window.stamps[-1]
+        while self.due and self.due[0][0] <= now:
+            _, seq, rule = heapq.heappop(self.due)
+            if self._waiting.get(id(rule)) == seq:
+                del self._waiting[id(rule)]
+                if rule.rearm_pct > 0:
+                    self.levels.discard_rearm(rule)
+                rearmed.append(rule)
+        return rearmed
+
+
+class _PollWindow:
+    """
+    两次检查之间到达的分时点（含本轮快照），按时间顺序排列
+    只判断最新快照会漏掉轮询间隔内冲高回落的情况，所以用这段区间的最高/最低值判断是否越过阈值。
+    """
+
+    __slots__ = ("times", "stamps", "prices", "ratios", "price_low", "price_high", "ratio_low", "ratio_high")
+
+    def __init__(self, times: List[str], stamps: List[int], prices: List[float], ratios: List[float]):
+        self.times = times
+        self.stamps = stamps
+        self.prices = prices
+        self.ratios = ratios
+        # 通常只有 1~3 个采样点，直接用内置 min/max，比转成 numpy 数组再归约快得多
+        self.price_low, self.price_high = min(prices), max(prices)
+        self.ratio_low, self.ratio_high = min(ratios), max(ratios)
+
+    def cross_index(self, rule: AlertRule) -> int:
+        """规则阈值第一次被越过的采样点"""
+        alert_type = rule.alert_type
+        if alert_type == AlertType.PRICE_ABOVE:
+            values, threshold, above = self.prices, rule.threshold, True
+        elif alert_type == AlertType.PRICE_BELOW:
+            values, threshold, above = self.prices, rule.threshold, False
+        elif alert_type == AlertType.CHANGE_ABOVE:
+            values, threshold, above = self.ratios, rule.threshold, True
+        else:
+            values, threshold, above = self.ratios, -abs(rule.threshold), False
+        for i, value in enumerate(values):
+            if (value >= threshold) if above else (value <= threshold):
+                return i
+        return 0
+
+
 class AlertManager:
-    """提醒管理器"""
+    """
+    提醒管理器
+    self.rules 保存全部规则（持久化、界面展示用）；另外按股票代码维护
+    只含“已启用且未触发”规则的阈值索引，每轮行情只看有规则的股票，
+    每只股票用二分一次取出所有被越过的阈值。
+    设置了自动重新启用的规则触发后进入等待索引，回撤越过滞后带或到期后回到待触发索引，
+    同样只在有等待规则的股票上做二分和堆顶比较。
+    规则保存在独立的 alerts.json 中，由后台线程合并写盘，行情线程不再等待磁盘。
+    """
     
-    def __init__(self, config_manager):
+    def __init__(self, config_manager, alerts_file: Optional[str] = None):
         self.config = config_manager
+        if alerts_file is None:
+            alerts_file = os.path.join(os.path.dirname(os.path.abspath(config_manager.config_file)), "alerts.json")
+        self.alerts_file = alerts_file
         self.rules: List[AlertRule] = []
+        self._rules_by_code: Dict[str, List[AlertRule]] = {}
+        self._armed: Dict[str, _CodeIndex] = {}
+        self._rearm: Dict[str, _RearmIndex] = {}
+        self._last_seen: Dict[str, int] = {}  # code -> 上次检查时最后一个分时点的时间戳（只记录有规则的股票）
+        self._last_quote: Dict[str, tuple] = {}  # code -> 上次参与判断的行情，未变化时跳过
+        self._lock = Lock()
         self._load_rules()
+        self._writer = DebouncedJsonWriter(self.alerts_file, self._snapshot)
     
     def _load_rules(self):
-        """从配置加载规则"""
-        rules_data = self.config.data.get("alerts", [])
-        self.rules = [AlertRule.from_dict(r) for r in rules_data]
+        """从 alerts.json 加载规则；首次运行时从旧版 config.json 的 alerts 字段迁移"""
+        rules_data = None
+        if os.path.exists(self.alerts_file):
+            try:
+                with open(self.alerts_file, 'r', encoding='utf-8') as f:
+                    rules_data = json.load(f).get("rules", [])
+            except (OSError, ValueError, AttributeError) as e:
+                logger.error(f"Error loading alerts: {e}")
+        if rules_data is None:
+            rules_data = self._migrate_from_config()
+        
+        with self._lock:
+            self.rules = [AlertRule.from_dict(r) for r in rules_data]
+            self._rebuild_index()
     
-    def _save_rules(self):
-        """保存规则到配置"""
-        self.config.data["alerts"] = [r.to_dict() for r in self.rules]
+    def _migrate_from_config(self) -> list:
+        """把 config.json 中的规则搬到 alerts.json，写入成功后再从配置中删除"""
+        rules_data = self.config.data.get("alerts")
+        if rules_data is None:
+            return []
+        try:
+            atomic_write_json(self.alerts_file, {"rules": rules_data})
+        except OSError as e:
+            logger.error(f"Error migrating alerts: {e}")
+            return rules_data
+        del self.config.data["alerts"]
         self.config.save()
+        logger.info(f"已将 {len(rules_data)} 条提醒规则迁移到 {self.alerts_file}")
+        return rules_data
+    
+    def _rebuild_index(self):
+        """重建按代码分组的规则表和待触发索引（调用方持有锁）"""
+        self._rules_by_code = {}
+        for rule in self.rules:
+            self._rules_by_code.setdefault(rule.code, []).append(rule)
+        self._armed = {}
+        self._rearm = {}
+        for code in self._rules_by_code:
+            self._reindex_code(code)
+    
+    def _reindex_code(self, code: str):
+        """重建单只股票的待触发索引和等待重新启用索引（调用方持有锁）"""
+        # 规则有变化，下一轮即使行情未变也要重新判断
+        self._last_quote.pop(code, None)
+        index = _CodeIndex()
+        rearm = _RearmIndex()
+        for rule in self._rules_by_code.get(code, []):
+            if not rule.enabled:
+                continue
+            if not rule.triggered:
+                index.add(rule)
+            elif rule.auto_rearm:
+                rearm.add(rule)
+        for indexes, value in ((self._armed, index), (self._rearm, rearm)):
+            if len(value):
+                indexes[code] = value
+            else:
+                indexes.pop(code, None)
+        if code not in self._armed and code not in self._rearm:
+            # 不再检查的股票不保留进度，重新加规则时只看最新快照
+            self._last_seen.pop(code, None)
+    
+    def _snapshot(self) -> dict:
+        """在写盘线程中调用"""
+        with self._lock:
+            return {"rules": [r.to_dict() for r in self.rules]}
+    
+    def _save_rules(self):
+        """标记规则已修改，由后台线程合并写盘"""
+        self._writer.mark_dirty()
+    
+    def flush(self):
+        """退出前把未写入的修改同步写盘"""
+        self._writer.flush()
     
     def add_rule(self, rule: AlertRule):
         """添加规则"""
-        self.rules.append(rule)
+        with self._lock:
+            self.rules.append(rule)
+            self._rules_by_code.setdefault(rule.code, []).append(rule)
+            if rule.enabled and not rule.triggered:
+                self._armed.setdefault(rule.code, _CodeIndex()).add(rule)
+                self._last_quote.pop(rule.code, None)
         self._save_rules()
     
-    def remove_rule(self, code: str, alert_type: AlertType):
-        """移除规则"""
-        self.rules = [r for r in self.rules if not (r.code == code and r.alert_type == alert_type)]
+    def remove_rule(self, code: str, alert_type: AlertType, expression: Optional[str] = None):
+        """移除规则；表达式规则可用 expression 指定只删除其中一条"""
+        def matches(r):
+            return (r.code == code and r.alert_type == alert_type
+                    and (expression is None or r.expression == expression))
+        
+        with self._lock:
+            self.rules = [r for r in self.rules if not matches(r)]
+            remaining = [r for r in self._rules_by_code.get(code, []) if not matches(r)]
+            if remaining:
+                self._rules_by_code[code] = remaining
+            else:
+                self._rules_by_code.pop(code, None)
+            self._reindex_code(code)
         self._save_rules()
     
+    def active_codes(self) -> set:
+        """有待触发或等待重新启用规则的股票，这些股票的行情需要按正常频率检查"""
+        with self._lock:
+            return self._armed.keys() | self._rearm.keys()
+    
     def get_rules_for_stock(self, code: str) -> List[AlertRule]:
         """获取某只股票的所有规则"""
-        return [r for r in self.rules if r.code == code]
+        return list(self._rules_by_code.get(code, []))
     
     def reset_triggered(self, code: str):
         """重置某只股票的触发状态"""
-        for rule in self.rules:
-            if rule.code == code:
+        with self._lock:
+            for rule in self._rules_by_code.get(code, []):
                 rule.triggered = False
+                rule.triggered_at = ""
+                rule.triggered_ts = 0
+            self._reindex_code(code)
         self._save_rules()
     
-    def check_alerts(self, stock_data: Dict) -> List[tuple]:
+    def check_alerts(self, stock_data: Dict, indicators=None) -> List[tuple]:
         """
         检查是否触发提醒
+        indicators: IndicatorEngine，表达式规则可引用其中的流式指标
         返回: [(rule, stock_info), ...] 触发的规则列表
         """
         triggered = []
+        changed = False
         
-        for rule in self.rules:
-            if not rule.enabled or rule.triggered:
-                continue
-            
-            if rule.code not in stock_data:
-                continue
-            
-            info = stock_data[rule.code]
-            price = float(info.get("price", 0))
-            
-            # 解析涨跌幅
-            ratio_str = info.get("ratio", "0%")
-            try:
-                ratio = float(ratio_str.replace("%", ""))
-            except:
-                ratio = 0.0
-            
-            should_trigger = False
+        with self._lock:
+            # 遍历规则较少的一侧：通常有规则的股票远少于本轮行情
+            watched = self._armed.keys() | self._rearm.keys() if self._rearm else self._armed.keys()
+            if len(watched) < len(stock_data):
+                codes = [code for code in watched if code in stock_data]
+            else:
+                codes = [code for code in stock_data if code in watched]
             
-            if rule.alert_type == AlertType.PRICE_ABOVE:
-                should_trigger = price >= rule.threshold
-            elif rule.alert_type == AlertType.PRICE_BELOW:
-                should_trigger = price <= rule.threshold
-            elif rule.alert_type == AlertType.CHANGE_ABOVE:
-                should_trigger = ratio >= rule.threshold
-            elif rule.alert_type == AlertType.CHANGE_BELOW:
-                should_trigger = ratio <= -abs(rule.threshold)
-            
-            if should_trigger:
-                rule.triggered = True
-                triggered.append((rule, info))
-                logger.info(f"Alert triggered: {rule.code} {rule.alert_type.value} {rule.threshold}")
+            for code in codes:
+                info = stock_data[code]
+                index = self._armed.get(code)
+                # 表达式还依赖成交量、指标等其他字段，有表达式规则时每轮都求值
+                window = self._poll_window(code, info, index is None or not index.expressions)
+                if window is None:
+                    continue
+                
+                fired = []
+                if index is not None:
+                    for rule in index.pop_triggered(window.price_low, window.price_high,
+                                                    window.ratio_low, window.ratio_high):
+                        i = window.cross_index(rule)
+                        rule.triggered_at, rule.triggered_ts = window.times[i], window.stamps[i]
+                        fired.append(rule)
+                        logger.info(f"Alert triggered: {rule.code} {rule.alert_type.value} "
+                                    f"{rule.threshold} at {rule.triggered_at}")
+                    
+                    if index.expressions:
+                        values = indicators.get(code) if indicators is not None else None
+                        for rule in index.pop_expressions(ExpressionContext(info, values)):
+                            rule.triggered_at, rule.triggered_ts = window.times[-1], window.stamps[-1]
+                            fired.append(rule)
+                            logger.info(f"Alert triggered: {rule.code} {rule.expression} at {rule.triggered_at}")
+                
+                # 上一轮及更早触发的规则：回撤越过滞后带或到期后重新启用，下一轮起参与判断
+                rearm = self._rearm.get(code)
+                if rearm is not None:
+                    rearmed = rearm.pop_rearmed(window)
+                    if rearmed:
+                        index = self._armed.setdefault(code, _CodeIndex())
+                        for rule in rearmed:
+                            rule.triggered = False
+                            rule.triggered_at = ""
+                            rule.triggered_ts = 0
+                            index.add(rule)
+                            logger.info(f"Alert re-armed: {rule.code} {rule.alert_type.value} {rule.threshold}")
+                        self._last_quote.pop(code, None)
+                        changed = True
+                
+                for rule in fired:
+                    rule.triggered = True
+                    triggered.append((rule, info))
+                    if rule.auto_rearm:
+                        if rearm is None:
+                            rearm = self._rearm[code] = _RearmIndex()
+                        rearm.add(rule)
+                
+                if index is not None and not len(index):
+                    del self._armed[code]
+                if rearm is not None and not len(rearm):
+                    del self._rearm[code]
         
-        if triggered:
+        if triggered or changed:
             self._save_rules()
         
         return triggered
+    
+    def _poll_window(self, code: str, info: dict, skip_unchanged: bool = True) -> Optional[_PollWindow]:
+        """
+        取出上次检查之后到达的分时点（上次的最后一分钟可能被就地更新，也包含在内）
+        第一次检查的股票只看最新快照，避免新加规则时被当天更早的走势触发
+        skip_unchanged 时，没有新分时点且最新分钟和快照的价格、涨跌幅都与上次相同则返回 None：
+        上次已用同样（更宽）的区间判断过，规则也没有变化，不会有新的触发
+        """
+        points = info.get("points")
+        last = points[-1] if points else None
+        if last is not None:
+            quote = (last.get("timestamp", 0), last["price"], last.get("change_pct", 0),
+                     info.get("price"), info.get("ratio"))
+        else:
+            quote = (info.get("price"), info.get("ratio"))
+        if skip_unchanged and self._last_quote.get(code) == quote:
+            return None
+        self._last_quote[code] = quote
+        
+        times, stamps, prices, ratios = [], [], [], []
+        last_seen = self._last_seen.get(code)
+        if last is not None:
+            # 记录本轮最后一个分时点，下一轮只看之后到达的点
+            self._last_seen[code] = quote[0]
+        if last is not None and last_seen is not None:
+            # 从末尾往前找，通常只有 0~2 个新分时点
+            start = len(points)
+            while start > 0 and points[start - 1].get("timestamp", 0) >= last_seen:
+                start -= 1
+            for p in points[start:]:
+                times.append(p["time"])
+                stamps.append(p.get("timestamp", 0))
+                prices.append(float(p["price"]))
+                ratios.append(float(p.get("change_pct", 0)))
+        
+        # 最新快照作为最后一个采样点
+        try:
+            price = float(info.get("price", 0))
+        except (ValueError, TypeError):
+            price = None  # 停牌等情况价格为 "--"
+        if price is not None:
+            times.append(last["time"] if last else "")
+            stamps.append(last.get("timestamp", 0) if last else int(time.time()))
+            prices.append(price)
+            ratios.append(parse_ratio(info.get("ratio", "0%")))
+        
+        if not prices:
+            return None
+        return _PollWindow(times, stamps, prices, ratios)
@@ -0,0 +1,368 @@
+"""
+提醒规则回测：在本地保存的分时历史上重放规则，统计过去若干个交易日会在何时触发
+每只股票的历史只读取一次，阈值和表达式都按整段数组向量化求值，
+只有触发点之间的跳转（滞后带 / 冷却时间）是逐次二分。
+
+与实时检查的差异：
+- 历史只有每分钟收盘价，看不到分钟内的冲高回落
+- 每个交易日开盘视为重新启用（相当于每天手动重置一次）
+- 表达式中的流式指标按包含当前分钟的完整数据计算
+"""
+import ast
+import logging
+import math
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from core.alert_expr import (
+    SERIES_FIELDS, WINDOW_FUNCS, ExpressionError, compile_expression,
+    _BIN_OPS, _COMPARE_OPS,
+)
+from core.alert_manager import AlertRule, AlertType
+from core.history_store import MARKET_TZ, HistoryStore
+from core.indicators import INDICATOR_FIELDS, StreamingIndicators
+from core.trading_session import AlignedSeries, get_time_slots
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BacktestResult:
+    """单条规则的回测结果"""
+    rule: AlertRule
+    days: List[str]  # 参与回测的交易日
+    fires: List[Tuple[str, str]] = field(default_factory=list)  # [(交易日, 时间), ...]
+
+    @property
+    def count(self) -> int:
+        return len(self.fires)
+
+    def per_day(self) -> Dict[str, int]:
+        counts = dict.fromkeys(self.days, 0)
+        for day, _ in self.fires:
+            counts[day] += 1
+        return counts
+
+
+def _slot_minutes(market: str) -> np.ndarray:
+    """各槽位距当天 0 点的分钟数，跨越午夜的时段顺延，保证单调递增"""
+    minutes = np.array([int(t[:2]) * 60 + int(t[3:]) for t in get_time_slots(market)])
+    wrapped = np.concatenate(([0], np.diff(minutes) < 0)).cumsum()
+    return minutes + wrapped * 24 * 60
+
+
+class _CodeHistory:
+    """一只股票若干交易日的有效区间，首尾相接成一段数组"""
+
+    def __init__(self, days: List[Tuple[str, AlignedSeries]]):
+        self.frame = None  # 表达式求值环境，同一只股票的表达式规则共用
+        self.days = [day for day, series in days if not series.is_empty]
+        self.frames = [series for _, series in days if not series.is_empty]
+        if not self.frames:
+            self.size = 0
+            return
+        market = self.frames[0].market
+        slots = get_time_slots(market)
+        slot_minutes = _slot_minutes(market)
+
+        day_index, positions, stamps = [], [], []
+        for i, (day, series) in enumerate(zip(self.days, self.frames)):
+            x = series.x
+            midnight = datetime.strptime(day, "%Y%m%d").replace(tzinfo=MARKET_TZ).timestamp()
+            day_index.append(np.full(len(x), i))
+            positions.append(x)
+            stamps.append(midnight + slot_minutes[x] * 60)
+        self.day_index = np.concatenate(day_index)
+        self.positions = np.concatenate(positions)
+        self.stamps = np.concatenate(stamps)
+        self.size = len(self.stamps)
+        self.slots = slots
+        # 每天第一个槽位
+        self.day_start = np.zeros(self.size, dtype=bool)
+        self.day_start[np.concatenate(([0], np.cumsum([len(p) for p in positions])[:-1]))] = True
+
+    def column(self, name: str) -> np.ndarray:
+        return np.concatenate([series.valid(name) for series in self.frames])
+
+    def label(self, index: int) -> Tuple[str, str]:
+        return self.days[self.day_index[index]], self.slots[self.positions[index]]
+
+
+# --- 阈值规则 ---
+
+def _threshold_masks(rule: AlertRule, history: _CodeHistory) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """(越过阈值, 回撤越过滞后带)，与实时检查使用相同的比较方向"""
+    if rule.alert_type in (AlertType.PRICE_ABOVE, AlertType.PRICE_BELOW):
+        values = history.column("price")
+    else:
+        values = history.column("change_pct")
+    pct = rule.rearm_pct
+    with np.errstate(invalid="ignore"):
+        if rule.alert_type == AlertType.PRICE_ABOVE:
+            return values >= rule.threshold, values <= rule.threshold * (1 - pct / 100) if pct > 0 else None
+        if rule.alert_type == AlertType.PRICE_BELOW:
+            return values <= rule.threshold, values >= rule.threshold * (1 + pct / 100) if pct > 0 else None
+        if rule.alert_type == AlertType.CHANGE_ABOVE:
+            return values >= rule.threshold, values <= rule.threshold - pct if pct > 0 else None
+        threshold = -abs(rule.threshold)
+        return values <= threshold, values >= threshold + pct if pct > 0 else None
+
+
+# --- 表达式 ---
+
+def _window_sum(values: np.ndarray, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    """values[start[i]:end[i]] 之和，用前缀和一次算出"""
+    cumulative = np.concatenate(([0.0], np.cumsum(values)))
+    return cumulative[end] - cumulative[start]
+
+
+class _Frame:
+    """
+    一只股票全部回测交易日的表达式求值环境，变量按需转成整段数组
+    窗口只在当天内滑动：开盘后不足 n 分钟时按实际分钟数，与实时规则一致。
+    """
+
+    def __init__(self, history: _CodeHistory):
+        self.history = history
+        self.size = history.size
+        lengths = np.array([s.last - s.first + 1 for s in history.frames])
+        self.lengths = lengths
+        self.day_first = np.repeat(np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+        self.index = np.arange(self.size)
+        self._cache: Dict[str, np.ndarray] = {}
+
+    def variable(self, name: str) -> np.ndarray:
+        values = self._cache.get(name)
+        if values is None:
+            values = self._cache[name] = self._load(name)
+        return values
+
+    def split(self, values: np.ndarray) -> List[np.ndarray]:
+        return np.split(values, np.cumsum(self.lengths)[:-1])
+
+    def window(self, values: np.ndarray, window: int, func_name: str) -> np.ndarray:
+        """包含当前分钟的最近 window 分钟（不跨日）"""
+        end = self.index + 1
+        start = np.maximum(end - window, self.day_first)
+        if func_name in ("mean", "sum", "std"):
+            total = _window_sum(values, start, end)
+            if func_name == "sum":
+                return total
+            count = end - start
+            mean = total / count
+            if func_name == "mean":
+                return mean
+            # 减去当天第一个值再求平方和，避免价格量级大时相减抵消损失精度
+            shifted = values - values[self.day_first]
+            shifted_mean = _window_sum(shifted, start, end) / count
+            squares = _window_sum(shifted * shifted, start, end)
+            return np.sqrt(np.maximum(squares / count - shifted_mean * shifted_mean, 0.0))
+        # max / min：逐日补 ∓inf 后滑动窗口
+        pad = -np.inf if func_name == "max" else np.inf
+        parts = []
+        for day in self.split(values):
+            view = sliding_window_view(np.concatenate((np.full(window - 1, pad), day)), window)
+            parts.append(view.max(axis=1) if func_name == "max" else view.min(axis=1))
+        return np.concatenate(parts)
+
+    def _load(self, name: str) -> np.ndarray:
+        history = self.history
+        if name in SERIES_FIELDS:
+            return history.column(SERIES_FIELDS[name])
+        if name in INDICATOR_FIELDS:
+            return self._indicator(name)
+        price = self.variable("price")
+        if name == "open":
+            return price[self.day_first]
+        if name == "high":
+            return np.concatenate([np.fmax.accumulate(day) for day in self.split(price)])
+        if name == "low":
+            return np.concatenate([np.fmin.accumulate(day) for day in self.split(price)])
+        if name == "pre_close":
+            return np.repeat([s.pre_close for s in history.frames], self.lengths)
+        if name == "volume":
+            volume = self.variable("volume_1m")
+            return _window_sum(volume, self.day_first, self.index + 1)
+        raise ExpressionError(f"分时历史中没有 {name}，无法回测")
+
+    def _indicator(self, name: str) -> np.ndarray:
+        """流式指标序列，与 StreamingIndicators 的定义一致（含当前分钟）"""
+        price = self.variable("price")
+        end = self.index + 1
+        result = np.full(self.size, np.nan)
+        if name == "vwap":
+            return self.variable("avg_price")
+        if name.startswith("ma"):
+            window = int(name[2:])
+            start = np.maximum(end - window, self.day_first)
+            full = end - start == window
+            result[full] = _window_sum(price, start, end)[full] / window
+            return result
+        # 当天第一分钟没有收益率
+        first = self.index == self.day_first
+        if name == "volatility":
+            returns = np.zeros(self.size)
+            returns[1:] = np.log(price[1:] / price[:-1])
+            returns[first] = 0.0
+            start = np.maximum(end - StreamingIndicators.VOLATILITY_WINDOW, self.day_first + 1)
+            enough = end - start >= 2
+            result[enough] = np.sqrt(_window_sum(returns * returns, start, end)[enough]) * 100
+            return result
+        if name == "volume_z":
+            # 与前 window 分钟（不含当前）比较
+            volume = self.variable("volume_1m")
+            start = np.maximum(self.index - StreamingIndicators.VOLUME_WINDOW, self.day_first)
+            count = self.index - start
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = _window_sum(volume, start, self.index) / count
+                std = np.sqrt(np.maximum(_window_sum(volume * volume, start, self.index) / count - mean * mean, 0.0))
+                z = (volume - mean) / std
+            valid = (count >= 2) & (std > 0)
+            result[valid] = z[valid]
+            return result
+        if name == "rsi":
+            return self._rsi(price, first)
+        raise ExpressionError(f"未知指标: {name}")
+
+    def _rsi(self, price: np.ndarray, first: np.ndarray) -> np.ndarray:
+        # Wilder 平滑是递推，用 Python 浮点数逐分钟计算，逐个取 numpy 元素要慢得多
+        period = StreamingIndicators.RSI_PERIOD
+        changes = np.zeros(self.size)
+        changes[1:] = np.diff(price)
+        rsi = [math.nan] * self.size
+        count = gain = loss = 0.0
+        for i, (change, is_first) in enumerate(zip(changes.tolist(), first.tolist())):
+            if is_first:
+                count = gain = loss = 0.0
+                continue
+            up, down = max(change, 0.0), max(-change, 0.0)
+            count += 1
+            if count <= period:
+                gain += up / period
+                loss += down / period
+                if count < period:
+                    continue
+            else:
+                gain = (gain * (period - 1) + up) / period
+                loss = (loss * (period - 1) + down) / period
+            if loss == 0:
+                rsi[i] = 100.0 if gain > 0 else 50.0
+            else:
+                rsi[i] = 100.0 - 100.0 / (1.0 + gain / loss)
+        return np.array(rsi)
+
+
+def _vector_eval(node: ast.AST, frame: _Frame):
+    """按整段数组对语法树求值；语法已由 compile_expression 校验过"""
+    if isinstance(node, ast.Constant):
+        return float(node.value)
+    if isinstance(node, ast.Name):
+        return frame.variable(node.id)
+    if isinstance(node, ast.UnaryOp):
+        operand = _vector_eval(node.operand, frame)
+        if isinstance(node.op, ast.USub):
+            return -operand
+        if isinstance(node.op, ast.Not):
+            return np.logical_not(operand)
+        return operand
+    if isinstance(node, ast.BinOp):
+        return _BIN_OPS[type(node.op)](_vector_eval(node.left, frame), _vector_eval(node.right, frame))
+    if isinstance(node, ast.BoolOp):
+        combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+        return combine.reduce([np.asarray(_vector_eval(v, frame), dtype=bool) for v in node.values])
+    if isinstance(node, ast.Compare):
+        left = _vector_eval(node.left, frame)
+        result = True
+        for op, comparator in zip(node.ops, node.comparators):
+            right = _vector_eval(comparator, frame)
+            result = np.logical_and(result, _COMPARE_OPS[type(op)](left, right))
+            left = right
+        return result
+    if isinstance(node, ast.Call):
+        name = node.func.id
+        if name in WINDOW_FUNCS and len(node.args) == 2 and isinstance(node.args[0], ast.Name):
+            return frame.window(frame.variable(node.args[0].id), node.args[1].value, name)
+        return np.abs(_vector_eval(node.args[0], frame))
+    raise ExpressionError(f"不支持的语法: {type(node).__name__}")
+
+
+def _expression_mask(rule: AlertRule, history: _CodeHistory) -> np.ndarray:
+    compile_expression(rule.expression)  # 校验语法和名称，错误信息与实时规则一致
+    tree = ast.parse(rule.expression.strip(), mode="eval").body
+    if history.frame is None:
+        history.frame = _Frame(history)
+    frame = history.frame
+    with np.errstate(invalid="ignore", divide="ignore"):
+        values = np.broadcast_to(np.asarray(_vector_eval(tree, frame)), frame.size)
+        # NaN（数据不足）视为不满足
+        return values.astype(bool) & ~np.isnan(values.astype(float))
+
+
+# --- 触发过程 ---
+
+def _fire_positions(hit: np.ndarray, release: np.ndarray, stamps: np.ndarray, rearm_minutes: int) -> List[int]:
+    """
+    hit: 满足触发条件；release: 重新启用的位置（滞后带 + 每天开盘）
+    每次触发后跳到下一次重新启用的位置，再二分出之后第一个满足条件的点
+    """
+    hits = np.flatnonzero(hit)
+    releases = np.flatnonzero(release)
+    fires = []
+    position = 0
+    while True:
+        k = np.searchsorted(hits, position)
+        if k == len(hits):
+            break
+        fired = int(hits[k])
+        fires.append(fired)
+        nexts = []
+        r = np.searchsorted(releases, fired + 1)
+        if r < len(releases):
+            nexts.append(releases[r])
+        if rearm_minutes > 0:
+            nexts.append(np.searchsorted(stamps, stamps[fired] + rearm_minutes * 60))
+        if not nexts:
+            break
+        position = min(nexts)
+    return fires
+
+
+def _run(rule: AlertRule, history: _CodeHistory) -> BacktestResult:
+    result = BacktestResult(rule, list(history.days))
+    if not history.size:
+        return result
+    if rule.alert_type == AlertType.EXPRESSION:
+        hit, band = _expression_mask(rule, history), None
+    else:
+        hit, band = _threshold_masks(rule, history)
+    release = history.day_start if band is None else history.day_start | band
+    for index in _fire_positions(hit, release, history.stamps, rule.rearm_minutes):
+        result.fires.append(history.label(index))
+    return result
+
+
+def backtest_rules(rules: Iterable[AlertRule], store: HistoryStore, days: int = 20,
+                   before: Optional[str] = None) -> List[BacktestResult]:
+    """
+    在最近 days 个已保存的交易日（早于 before）上回测规则，按输入顺序返回结果
+    同一只股票的规则共用一次历史读取；表达式无效时抛出 ExpressionError
+    """
+    rules = list(rules)
+    histories: Dict[str, _CodeHistory] = {}
+    results = []
+    for rule in rules:
+        history = histories.get(rule.code)
+        if history is None:
+            saved = [(day, series) for day, series in store.archive(rule.code) if before is None or day < before]
+            history = histories[rule.code] = _CodeHistory(saved[-days:])
+        results.append(_run(rule, history))
+    return results
+
+
+def backtest_rule(rule: AlertRule, store: HistoryStore, days: int = 20,
+                  before: Optional[str] = None) -> BacktestResult:
+    return backtest_rules([rule], store, days, before)[0]
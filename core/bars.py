@@ -0,0 +1,133 @@
+"""
+多周期 K 线：由分钟槽位聚合出 5/15/30/60 分钟 OHLCV
+每个周期按需计算，之后只重算最后一根被修改的 K 线及其后新增的部分。
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Tuple
+
+import numpy as np
+
+from core.trading_session import AlignedSeries, get_time_slots
+
+TIMEFRAMES = (5, 15, 30, 60)
+
+
+@lru_cache(maxsize=None)
+def get_bar_layout(market: str, minutes: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    K 线在分钟槽位上的划分
+    每个交易时段的开盘分钟并入第一根 K 线（如 A 股 5 分钟线 09:35 包含 09:30-09:35），
+    K 线不跨越午休。
+    返回: (每根 K 线的起始槽位, 槽位 -> K 线下标)
+    """
+    slots = get_time_slots(market)
+    minute_of_day = np.array([int(t[:2]) * 60 + int(t[3:]) for t in slots])
+
+    # 相邻槽位相差超过 1 分钟即为新时段
+    session_start = np.ones(len(slots), dtype=bool)
+    session_start[1:] = np.diff(minute_of_day) > 1
+    session_open = minute_of_day[np.maximum.accumulate(np.where(session_start, np.arange(len(slots)), 0))]
+
+    elapsed = minute_of_day - session_open
+    bucket = np.maximum(np.ceil(elapsed / minutes).astype(np.int64), 1)
+    new_bar = session_start.copy()
+    new_bar[1:] |= bucket[1:] != bucket[:-1]
+
+    starts = np.flatnonzero(new_bar)
+    bar_of_slot = np.cumsum(new_bar) - 1
+    starts.setflags(write=False)
+    bar_of_slot.setflags(write=False)
+    return starts, bar_of_slot
+
+
+@dataclass
+class OHLCVBars:
+    """
+    某一周期的 K 线，数组长度等于当日该周期的 K 线总数，未到达的为 NaN（量额为 0）。
+    [first, last] 为有效 K 线区间。
+    """
+    minutes: int
+    slot_count: int
+    starts: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    amount: np.ndarray
+    first: int = 0
+    last: int = -1
+
+    @property
+    def is_empty(self) -> bool:
+        return self.first > self.last
+
+    @property
+    def ends(self) -> np.ndarray:
+        """每根 K 线的最后一个槽位"""
+        return np.append(self.starts[1:], self.slot_count) - 1
+
+    def valid(self, name: str) -> np.ndarray:
+        return getattr(self, name)[self.first:self.last + 1]
+
+
+class BarAggregator:
+    """
+    为一条 AlignedSeries 惰性维护多个周期的 K 线
+    AlignedSeries.merge_points 只会修改不早于原最后槽位的数据，
+    所以每个周期只需从上次计算时最后一根 K 线开始重算；分时序列整体重建后全部重算。
+    """
+
+    def __init__(self):
+        self._series = None
+        self._bars: Dict[int, OHLCVBars] = {}
+        self._computed_last: Dict[int, int] = {}  # minutes -> 上次计算时的最后槽位
+
+    def get(self, series: AlignedSeries, minutes: int) -> OHLCVBars:
+        if series is not self._series:
+            self._series = series
+            self._bars = {}
+            self._computed_last = {}
+
+        bars = self._bars.get(minutes)
+        if bars is None:
+            bars = self._bars[minutes] = self._empty_bars(series.market, minutes)
+
+        if series.is_empty:
+            return bars
+
+        _, bar_of_slot = get_bar_layout(series.market, minutes)
+        computed = self._computed_last.get(minutes)
+        # 上次的最后一根可能被就地更新，从它开始重算
+        first_bar = bar_of_slot[series.first if computed is None else computed]
+        self._aggregate(series, bars, int(first_bar), int(bar_of_slot[series.last]))
+        bars.first = int(bar_of_slot[series.first])
+        bars.last = int(bar_of_slot[series.last])
+        self._computed_last[minutes] = series.last
+        return bars
+
+    @staticmethod
+    def _empty_bars(market: str, minutes: int) -> OHLCVBars:
+        starts, bar_of_slot = get_bar_layout(market, minutes)
+        count = len(starts)
+        return OHLCVBars(minutes, len(bar_of_slot), starts,
+                         **{name: np.full(count, np.nan) for name in ("open", "high", "low", "close")},
+                         volume=np.zeros(count), amount=np.zeros(count))
+
+    @staticmethod
+    def _aggregate(series: AlignedSeries, bars: OHLCVBars, first_bar: int, last_bar: int):
+        """用 reduceat 一次算出 [first_bar, last_bar] 内所有 K 线"""
+        begin = max(int(bars.starts[first_bar]), series.first)
+        end = series.last + 1
+        offsets = np.maximum(bars.starts[first_bar:last_bar + 1], begin) - begin
+        target = slice(first_bar, last_bar + 1)
+
+        price = series.price[begin:end]
+        bars.high[target] = np.fmax.reduceat(price, offsets)
+        bars.low[target] = np.fmin.reduceat(price, offsets)
+        bars.volume[target] = np.add.reduceat(series.volume[begin:end], offsets)
+        bars.amount[target] = np.add.reduceat(series.amount[begin:end], offsets)
+        bars.open[target] = price[offsets]
+        closes = np.append(offsets[1:], len(price)) - 1
+        bars.close[target] = price[closes]
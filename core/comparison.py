@@ -0,0 +1,96 @@
+"""
+多股叠加对比：把多只股票的分时价格归一化为相对昨收的涨跌幅，放到同一条时间轴上
+"""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.trading_session import AlignedSeries, align_points, get_market_type, get_time_slots
+
+
+class NormalizedOverlay:
+    """
+    维护一个 (股票数, 槽位数) 的涨跌幅矩阵
+    - 所有股票对齐到同一市场的时间轴（以第一只股票的市场为准，其他市场多出的时段被丢弃）
+    - 每只股票保留自己的 AlignedSeries，新分钟通过 merge_points 增量合并，
+      只重算该行变化的列；新增一只股票只需对齐这一只
+    """
+
+    def __init__(self, market: Optional[str] = None):
+        self.market = market
+        self.codes: List[str] = []
+        self._series: Dict[str, AlignedSeries] = {}
+        self._row: Dict[str, int] = {}
+        self.matrix = np.zeros((0, 0))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __contains__(self, code):
+        return code in self._row
+
+    def _slot_count(self) -> int:
+        return len(get_time_slots(self.market))
+
+    def add(self, code: str, points, pre_close: float):
+        if code in self._row:
+            self.update(code, points, pre_close)
+            return
+        if self.market is None:
+            self.market = get_market_type(code)
+        if self.matrix.shape[1] == 0:
+            self.matrix = np.zeros((0, self._slot_count()))
+
+        self._row[code] = len(self.codes)
+        self.codes.append(code)
+        self.matrix = np.vstack([self.matrix, np.full((1, self.matrix.shape[1]), np.nan)])
+        self._rebuild_row(code, points, pre_close)
+
+    def remove(self, code: str):
+        row = self._row.pop(code, None)
+        if row is None:
+            return
+        del self.codes[row]
+        self._series.pop(code, None)
+        self.matrix = np.delete(self.matrix, row, axis=0)
+        self._row = {c: i for i, c in enumerate(self.codes)}
+
+    def update(self, code: str, points, pre_close: float) -> bool:
+        """合并一只股票的最新分时点，返回该行是否有变化"""
+        series = self._series.get(code)
+        if series is None:
+            return False
+        start = None
+        if series.pre_close == pre_close:
+            start = series.merge_points(points)
+        if start is None:
+            self._rebuild_row(code, points, pre_close)
+            return True
+        if start < 0:
+            return False
+        self._normalize(self._row[code], series, start)
+        return True
+
+    def _rebuild_row(self, code, points, pre_close):
+        series = align_points(points, code, pre_close, market=self.market)
+        self._series[code] = series
+        row = self._row[code]
+        self.matrix[row] = np.nan
+        if not series.is_empty:
+            self._normalize(row, series, series.first)
+
+    @staticmethod
+    def _base_price(series: AlignedSeries) -> float:
+        # 没有昨收时以当日第一个价格为基准
+        return series.pre_close if series.pre_close > 0 else float(series.price[series.first])
+
+    def _normalize(self, row: int, series: AlignedSeries, start: int):
+        end = series.last + 1
+        self.matrix[row, start:end] = (series.price[start:end] / self._base_price(series) - 1) * 100
+
+    def row(self, code: str) -> Tuple[np.ndarray, np.ndarray]:
+        """某只股票的有效区间涨跌幅，返回 (x, y)"""
+        series = self._series[code]
+        if series.is_empty:
+            return np.zeros(0), np.zeros(0)
+        return series.x, self.matrix[self._row[code], series.first:series.last + 1]
@@ -1,8 +1,46 @@
+import copy
 import json
 import os
 from threading import Lock
+from typing import Optional
+
+from core.json_writer import DebouncedJsonWriter
+
+class Watchlist:
+    """
+    不可变的自选股快照：代码元组 + 代码到位置的字典 + 版本号
+    修改时生成新快照整体替换，行情线程和界面拿到的始终是一份一致的列表，
+    成员判断和位置查询都是 O(1)；比较 version 即可知道列表是否变过。
+    """
+
+    __slots__ = ("codes", "version", "_positions")
+
+    def __init__(self, codes=(), version: int = 0):
+        # 去重并保持顺序
+        self.codes = tuple(dict.fromkeys(codes))
+        self.version = version
+        self._positions = {code: i for i, code in enumerate(self.codes)}
+
+    def __contains__(self, code):
+        return code in self._positions
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __iter__(self):
+        return iter(self.codes)
+
+    def index(self, code) -> Optional[int]:
+        """代码所在位置，不在列表中返回 None"""
+        return self._positions.get(code)
+
 
 class ConfigManager:
+    """
+    配置读写
+    setter 只修改内存并标记待写，由后台线程合并一段时间内的修改后原子写盘，
+    GUI 线程不会等待磁盘；退出前调用 flush() 同步写入。
+    """
     DEFAULT_CONFIG = {
         "refresh_interval": 3,
         "window": {
@@ -21,8 +59,10 @@ class ConfigManager:
 
     def __init__(self, config_file="config.json"):
         self.config_file = config_file
-        self._lock = Lock()
+        self._lock = Lock()  # 保护 self.data 的修改与写盘线程的快照
         self.data = self._load()
+        self._watchlist = Watchlist(self.data.get("stocks", []))
+        self._writer = DebouncedJsonWriter(self.config_file, self._snapshot)
 
     def _load(self):
         if not os.path.exists(self.config_file):
@@ -38,55 +78,75 @@ class ConfigManager:
             print(f"Error loading config: {e}")
             return self.DEFAULT_CONFIG.copy()
 
-    def save(self):
+    def _snapshot(self):
+        """在写盘线程中调用，复制一份避免序列化时被 GUI 线程修改"""
         with self._lock:
-            try:
-                with open(self.config_file, 'w', encoding='utf-8') as f:
-                    json.dump(self.data, f, indent=4)
-            except Exception as e:
-                print(f"Error saving config: {e}")
+            return copy.deepcopy(self.data)
+
+    def save(self):
+        """标记配置已修改，由后台线程合并写盘"""
+        self._writer.mark_dirty()
+
+    def flush(self):
+        """退出前把未写入的修改同步写盘，并停止写盘线程（之后的 save() 直接同步写盘）"""
+        self._writer.flush()
 
     def get_refresh_interval(self):
         return self.data.get("refresh_interval", 3)
 
     def set_refresh_interval(self, seconds):
         if seconds < 1: seconds = 1
-        self.data["refresh_interval"] = seconds
+        with self._lock:
+            self.data["refresh_interval"] = seconds
         self.save()
 
     def get_stocks(self):
-        return self.data.get("stocks", [])
+        """当前自选股代码（元组快照），迭代期间不受其他线程修改影响"""
+        return self._watchlist.codes
+
+    def get_watchlist(self) -> "Watchlist":
+        return self._watchlist
+
+    def _replace_stocks(self, codes):
+        """生成新快照并整体替换；读者拿到的旧快照保持不变"""
+        with self._lock:
+            self._watchlist = Watchlist(codes, self._watchlist.version + 1)
+            self.data["stocks"] = list(self._watchlist.codes)
+        self.save()
 
     def add_stock(self, code):
-        if code not in self.data["stocks"]:
-            self.data["stocks"].append(code)
-            self.save()
+        watchlist = self._watchlist
+        if code in watchlist:
+            return
+        self._replace_stocks(watchlist.codes + (code,))
 
     def remove_stock(self, code):
-        if code in self.data["stocks"]:
-            self.data["stocks"].remove(code)
-            self.save()
+        watchlist = self._watchlist
+        index = watchlist.index(code)
+        if index is None:
+            return
+        self._replace_stocks(watchlist.codes[:index] + watchlist.codes[index + 1:])
     
     def move_stock(self, code, direction):
         """
         移动股票在列表中的位置
         direction: -1 表示上移, 1 表示下移
         """
-        stocks = self.data.get("stocks", [])
-        if code not in stocks:
+        watchlist = self._watchlist
+        current_index = watchlist.index(code)
+        if current_index is None:
             return False
         
-        current_index = stocks.index(code)
         new_index = current_index + direction
         
         # 边界检查
-        if new_index < 0 or new_index >= len(stocks):
+        if new_index < 0 or new_index >= len(watchlist):
             return False
         
         # 交换位置
+        stocks = list(watchlist.codes)
         stocks[current_index], stocks[new_index] = stocks[new_index], stocks[current_index]
-        self.data["stocks"] = stocks
-        self.save()
+        self._replace_stocks(stocks)
         return True
     
     def reorder_stocks(self, new_order):
@@ -95,10 +155,8 @@ class ConfigManager:
         new_order: 新的股票代码顺序列表
         """
         # 验证新顺序包含所有现有股票
-        current = set(self.data.get("stocks", []))
-        if set(new_order) == current:
-            self.data["stocks"] = new_order
-            self.save()
+        if len(new_order) == len(self._watchlist) and set(new_order) == set(self._watchlist.codes):
+            self._replace_stocks(new_order)
             return True
         return False
             
@@ -106,9 +164,10 @@ class ConfigManager:
         return self.data.get("window", {})
     
     def update_window_settings(self, key, value):
-        if "window" not in self.data:
-            self.data["window"] = {}
-        self.data["window"][key] = value
+        with self._lock:
+            if "window" not in self.data:
+                self.data["window"] = {}
+            self.data["window"][key] = value
         self.save()
 
     def get_hotkeys(self):
@@ -118,5 +177,6 @@ class ConfigManager:
         })
 
     def set_hotkeys(self, hotkeys):
-        self.data["hotkeys"] = hotkeys
+        with self._lock:
+            self.data["hotkeys"] = hotkeys
         self.save()
@@ -0,0 +1,221 @@
+"""
+多日分时历史：按 股票/交易日 保存在本地，收盘后写入一次
+文件布局: history/<code>/<YYYYMMDD>.npz，只保存有效槽位区间的各列
+另有 history/<code>/archive.npz 把全部交易日合并在一个文件里，供回测等批量读取
+"""
+import logging
+import os
+import tempfile
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from core.trading_session import AlignedSeries, align_points, get_market_type, get_time_slots
+
+logger = logging.getLogger(__name__)
+
+# 行情时间戳按北京时间换算交易日
+MARKET_TZ = timezone(timedelta(hours=8))
+
+_COLUMNS = ("price", "avg_price", "change", "change_pct", "volume", "amount")
+
+ARCHIVE_NAME = "archive"
+
+
+def trading_day(timestamp: int) -> str:
+    """时间戳 -> 交易日 YYYYMMDD"""
+    return datetime.fromtimestamp(timestamp, tz=MARKET_TZ).strftime("%Y%m%d")
+
+
+def _atomic_savez(path: str, **arrays):
+    """同目录下唯一的临时文件写完再原子替换，多个线程同时写同一文件也不会互相覆盖临时文件"""
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".npz", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class HistoryStore:
+    """
+    本地分时历史
+    - record(): 行情线程每轮调用，某只股票当天已收盘（最后一个点到达收盘槽位）且尚未保存时写盘
+    - load(): 读取某一天，最近读取的若干天保存在内存 LRU 中
+    已保存的交易日不会再写入或重新下载。
+    """
+
+    def __init__(self, directory: str = "history", cache_size: int = 32):
+        self.directory = directory
+        self._cache_size = cache_size
+        self._cache = OrderedDict()  # (code, day) -> AlignedSeries
+        self._saved = set()  # (code, day)，避免每轮都检查文件
+        self._saved_lock = Lock()  # record() 在多个行情线程中调用，检查和登记 _saved 需原子完成
+        self._lock = Lock()
+
+    def _path(self, code: str, day: str) -> str:
+        return os.path.join(self.directory, code, f"{day}.npz")
+
+    def days(self, code: str) -> List[str]:
+        """已保存的交易日（升序）"""
+        folder = os.path.join(self.directory, code)
+        if not os.path.isdir(folder):
+            return []
+        return sorted(name[:-4] for name in os.listdir(folder) if name.endswith(".npz") and name[:-4].isdigit())
+
+    def record(self, results: dict):
+        """保存已收盘的当日分时，results 为一轮行情 {code: data}"""
+        for code, info in results.items():
+            points = info.get("points") or []
+            if not points or "timestamp" not in points[0]:
+                continue
+            day = trading_day(points[0]["timestamp"])
+            key = (code, day)
+            if key in self._saved:
+                continue
+            slots = get_time_slots(get_market_type(code))
+            if points[-1]["time"] < slots[-1]:
+                continue  # 尚未收盘
+            with self._saved_lock:
+                # 先登记再写盘，同时运行的其他行情线程不会重复写同一天
+                if key in self._saved:
+                    continue
+                self._saved.add(key)
+            path = self._path(code, day)
+            if not os.path.exists(path):
+                try:
+                    self._write(path, align_points(points, code, info.get("preClose", 0)))
+                    logger.info(f"[{code}] 已保存 {day} 分时历史")
+                except OSError as e:
+                    logger.error(f"[{code}] 保存分时历史失败: {e}")
+                    with self._saved_lock:
+                        self._saved.discard(key)  # 下一轮重试
+
+    @staticmethod
+    def _write(path: str, series: AlignedSeries):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        valid = slice(series.first, series.last + 1)
+        _atomic_savez(
+            path, first=series.first, pre_close=series.pre_close,
+            first_timestamp=series.first_timestamp,
+            **{name: getattr(series, name)[valid] for name in _COLUMNS}
+        )
+
+    def load(self, code: str, day: str) -> Optional[AlignedSeries]:
+        key = (code, day)
+        with self._lock:
+            series = self._cache.get(key)
+            if series is not None:
+                self._cache.move_to_end(key)
+                return series
+
+        series = self._read(code, day)
+        if series is None:
+            return None
+        with self._lock:
+            self._cache[key] = series
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return series
+
+    def _read(self, code: str, day: str) -> Optional[AlignedSeries]:
+        path = self._path(code, day)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                market = get_market_type(code)
+                size = len(get_time_slots(market))
+                first = int(data["first"])
+                columns = {}
+                for name in _COLUMNS:
+                    column = np.zeros(size) if name in ("volume", "amount") else np.full(size, np.nan)
+                    values = data[name]
+                    column[first:first + len(values)] = values
+                    columns[name] = column
+                return AlignedSeries(market, float(data["pre_close"]), first=first,
+                                     last=first + len(data["price"]) - 1,
+                                     first_timestamp=int(data["first_timestamp"]), **columns)
+        except (OSError, KeyError, ValueError) as e:
+            logger.error(f"[{code}] 读取分时历史 {day} 失败: {e}")
+            return None
+
+    def archive(self, code: str) -> List[Tuple[str, AlignedSeries]]:
+        """
+        全部已保存的交易日（升序），供回测批量读取，不经过 LRU
+        逐日文件每个都要单独解压，一年要读上百个；这里从合并文件一次读出，
+        有新保存的交易日时补入后重写合并文件。
+        """
+        days = self.days(code)
+        if not days:
+            return []
+        archived = self._read_archive(code)
+        missing = [day for day in days if day not in archived]
+        if missing:
+            for day in missing:
+                series = self._read(code, day)
+                if series is not None:
+                    archived[day] = series
+            try:
+                self._write_archive(code, archived)
+            except OSError as e:
+                logger.error(f"[{code}] 写入合并历史失败: {e}")
+        return [(day, archived[day]) for day in days if day in archived]
+
+    def _read_archive(self, code: str) -> dict:
+        path = self._path(code, ARCHIVE_NAME)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with np.load(path) as data:
+                market = get_market_type(code)
+                size = len(get_time_slots(market))
+                firsts, lengths = data["first"], data["length"]
+                pre_closes, first_timestamps = data["pre_close"], data["first_timestamp"]
+                offsets = np.concatenate(([0], np.cumsum(lengths)))
+                packed = {name: data[name] for name in _COLUMNS}
+                archived = {}
+                for i, day in enumerate(data["days"]):
+                    first, length = int(firsts[i]), int(lengths[i])
+                    columns = {}
+                    for name in _COLUMNS:
+                        column = np.zeros(size) if name in ("volume", "amount") else np.full(size, np.nan)
+                        column[first:first + length] = packed[name][offsets[i]:offsets[i + 1]]
+                        columns[name] = column
+                    archived[str(day)] = AlignedSeries(market, float(pre_closes[i]), first=first,
+                                                       last=first + length - 1,
+                                                       first_timestamp=int(first_timestamps[i]), **columns)
+                return archived
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"[{code}] 合并历史无法读取，将重新生成: {e}")
+            return {}
+
+    def _write_archive(self, code: str, archived: dict):
+        days = sorted(archived)
+        items = [archived[day] for day in days]
+        _atomic_savez(
+            self._path(code, ARCHIVE_NAME), days=np.array(days),
+            first=np.array([s.first for s in items]),
+            length=np.array([s.last - s.first + 1 for s in items]),
+            pre_close=np.array([s.pre_close for s in items], dtype=float),
+            first_timestamp=np.array([s.first_timestamp for s in items], dtype=np.int64),
+            **{name: np.concatenate([s.valid(name) for s in items]) for name in _COLUMNS}
+        )
+
+    def recent(self, code: str, count: int, before: Optional[str] = None) -> List[Tuple[str, AlignedSeries]]:
+        """最近 count 个交易日（早于 before），按时间升序返回 [(交易日, 序列), ...]"""
+        days = [d for d in self.days(code) if before is None or d < before]
+        result = []
+        for day in days[-count:]:
+            series = self.load(code, day)
+            if series is not None:
+                result.append((day, series))
+        return result
@@ -0,0 +1,189 @@
+"""
+流式技术指标：每只股票随分时点增量更新
+- 均线 MA5 / MA20、RSI14（Wilder 平滑）、已实现波动率、量能 Z 分数
+- VWAP 直接取接口给出的全天均价 avg_price（接口已按全天累计计算）
+每个新确认的分钟只做常数次运算，窗口类指标用环形缓冲区维护和与平方和，不回看全天数据。
+最后一个分时点是尚未走完的分钟，不计入；下一分钟到达时它才被确认。
+"""
+import logging
+import math
+from threading import Lock
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 指标名 -> 显示名，提醒表达式中可直接使用这些变量名
+INDICATOR_FIELDS = {
+    "ma5": "MA5",
+    "ma20": "MA20",
+    "vwap": "均价",
+    "rsi": "RSI14",
+    "volatility": "波动",
+    "volume_z": "量Z",
+}
+
+
+class RollingWindow:
+    """定长环形缓冲区，O(1) 维护窗口内的和与平方和"""
+
+    __slots__ = ("size", "count", "total", "total_sq", "_buf", "_pos")
+
+    def __init__(self, size: int):
+        self.size = size
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self._buf = [0.0] * size
+        self._pos = 0
+
+    def push(self, value: float):
+        if self.count == self.size:
+            old = self._buf[self._pos]
+            self.total -= old
+            self.total_sq -= old * old
+        else:
+            self.count += 1
+        self._buf[self._pos] = value
+        self.total += value
+        self.total_sq += value * value
+        self._pos += 1
+        if self._pos == self.size:
+            self._pos = 0
+            # 每转一圈重新求和一次，消除增减带来的浮点累计误差（摊销后仍为 O(1)）
+            self.total = sum(self._buf)
+            self.total_sq = sum(v * v for v in self._buf)
+
+    @property
+    def full(self) -> bool:
+        return self.count == self.size
+
+    def mean(self) -> float:
+        return self.total / self.count
+
+    def std(self) -> float:
+        mean = self.total / self.count
+        return math.sqrt(max(self.total_sq / self.count - mean * mean, 0.0))
+
+
+class StreamingIndicators:
+    """一只股票当天的指标状态，push() 每次接收一个已确认的分钟"""
+
+    MA_WINDOWS = (5, 20)
+    RSI_PERIOD = 14
+    VOLATILITY_WINDOW = 20
+    VOLUME_WINDOW = 20
+
+    def __init__(self, day_key):
+        self.day_key = day_key  # 当天第一个分时点的时间戳，变化时说明换了交易日
+        self.consumed = 0  # 已确认的分钟数
+        self.values: Dict[str, Optional[float]] = dict.fromkeys(INDICATOR_FIELDS)
+        self._ma = [RollingWindow(n) for n in self.MA_WINDOWS]
+        self._returns = RollingWindow(self.VOLATILITY_WINDOW)
+        self._volumes = RollingWindow(self.VOLUME_WINDOW)
+        self._last_price = None
+        self._rsi_count = 0
+        self._avg_gain = 0.0
+        self._avg_loss = 0.0
+
+    def push(self, point: dict):
+        self.consumed += 1
+        price = point.get("price", 0)
+        if not price or price <= 0:
+            return
+        values = dict(self.values)
+
+        for window, n in zip(self._ma, self.MA_WINDOWS):
+            window.push(price)
+            values[f"ma{n}"] = window.mean() if window.full else None
+
+        if self._last_price:
+            self._returns.push(math.log(price / self._last_price))
+            if self._returns.count >= 2:
+                # 窗口内分钟对数收益率平方和开方，单位 %
+                values["volatility"] = math.sqrt(self._returns.total_sq) * 100
+            values["rsi"] = self._push_rsi(price - self._last_price)
+        self._last_price = price
+
+        # 与前 N 分钟比较，再把本分钟放入窗口
+        volume = float(point.get("volume", 0))
+        volumes = self._volumes
+        if volumes.count >= 2:
+            std = volumes.std()
+            values["volume_z"] = (volume - volumes.mean()) / std if std > 0 else None
+        volumes.push(volume)
+
+        avg_price = point.get("avg_price")
+        values["vwap"] = float(avg_price) if avg_price else None
+
+        # 整体替换，其他线程读到的始终是一份完整的结果
+        self.values = values
+
+    def _push_rsi(self, change: float) -> Optional[float]:
+        n = self.RSI_PERIOD
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        self._rsi_count += 1
+        if self._rsi_count <= n:
+            # 前 n 个变化取简单平均作为初值
+            self._avg_gain += gain / n
+            self._avg_loss += loss / n
+            if self._rsi_count < n:
+                return None
+        else:
+            self._avg_gain = (self._avg_gain * (n - 1) + gain) / n
+            self._avg_loss = (self._avg_loss * (n - 1) + loss) / n
+        if self._avg_loss == 0:
+            return 100.0 if self._avg_gain > 0 else 50.0
+        return 100.0 - 100.0 / (1.0 + self._avg_gain / self._avg_loss)
+
+
+class IndicatorEngine:
+    """
+    所有股票的流式指标
+    update() 在行情线程中每轮调用，只把新确认的分钟送入各股票的状态；
+    get() 返回最新结果字典，GUI 线程读取无需加锁。
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._states: Dict[str, StreamingIndicators] = {}
+
+    def update(self, results: Dict[str, dict]):
+        with self._lock:
+            for code, info in results.items():
+                points = info.get("points") or []
+                if len(points) < 2:
+                    continue
+                confirmed = len(points) - 1
+                day_key = points[0].get("timestamp", points[0].get("time"))
+                state = self._states.get(code)
+                if state is None or state.day_key != day_key or state.consumed > confirmed:
+                    # 新的交易日（或首次出现）：从当天第一个分钟开始补算一次
+                    state = StreamingIndicators(day_key)
+                    self._states[code] = state
+                for point in points[state.consumed:confirmed]:
+                    state.push(point)
+
+    def remove(self, code: str):
+        with self._lock:
+            self._states.pop(code, None)
+
+    def get(self, code: str) -> Dict[str, Optional[float]]:
+        """{指标名: 值}，数据不足的指标为 None；没有数据时返回空字典"""
+        state = self._states.get(code)
+        return state.values if state is not None else {}
+
+
+def describe(values: Dict[str, Optional[float]]) -> str:
+    """格式化为一行文字，供表格提示和图表状态栏显示"""
+    parts = []
+    for name, label in INDICATOR_FIELDS.items():
+        value = values.get(name)
+        if value is None:
+            continue
+        if name == "volatility":
+            parts.append(f"{label} {value:.2f}%")
+        elif name in ("rsi", "volume_z"):
+            parts.append(f"{label} {value:.1f}")
+        else:
+            parts.append(f"{label} {value:.2f}")
+    return " · ".join(parts)
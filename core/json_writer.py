@@ -0,0 +1,104 @@
+"""
+JSON 文件写盘工具
+- atomic_write_json: 先写临时文件并 fsync，再原子替换，写到一半崩溃也不会留下损坏的文件
+- DebouncedJsonWriter: 后台线程延迟写盘，一段时间内的多次修改合并为一次写入
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def atomic_write_json(path: str, data, indent: int = 4):
+    """原子写入 JSON：同目录临时文件 -> flush + fsync -> os.replace"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class DebouncedJsonWriter:
+    """
+    延迟合并的后台写盘
+    mark_dirty() 只做标记并立即返回；后台线程在最后一次标记后等待 delay 秒
+    （连续修改时最多等待 max_delay 秒），再调用 snapshot() 取当前数据写盘。
+    snapshot 在写盘线程中调用，需自行保证线程安全。
+    flush() 之后后台线程退出，此后的 mark_dirty() 在调用线程中同步写盘。
+    """
+
+    def __init__(self, path: str, snapshot, delay: float = 0.5, max_delay: float = 5.0):
+        self.path = path
+        self._snapshot = snapshot
+        self._delay = delay
+        self._max_delay = max_delay
+        self._cond = threading.Condition()
+        self._dirty_since = None  # 第一次未写入修改的时间
+        self._last_change = 0.0
+        self._stopped = False
+        self._write_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=f"writer:{os.path.basename(path)}")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def mark_dirty(self):
+        with self._cond:
+            if not self._stopped:
+                now = time.monotonic()
+                if self._dirty_since is None:
+                    self._dirty_since = now
+                self._last_change = now
+                self._cond.notify()
+                return
+        # flush() 之后后台线程已停止，退出过程中的修改直接同步写盘
+        self._write()
+
+    def flush(self):
+        """
+        停止后台线程并把未写入的修改写盘（退出程序前调用），在调用线程中同步完成
+        后台线程正在写盘时先等它写完，返回时文件已是最新内容
+        """
+        with self._cond:
+            self._stopped = True
+            dirty = self._dirty_since is not None
+            self._dirty_since = None
+            self._cond.notify()
+        self._thread.join()
+        if dirty:
+            self._write()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._dirty_since is None and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                now = time.monotonic()
+                due = min(self._last_change + self._delay, self._dirty_since + self._max_delay)
+                if now < due:
+                    self._cond.wait(due - now)
+                    continue
+                self._dirty_since = None
+            self._write()
+
+    def _write(self):
+        # flush() 与后台线程可能同时写，串行化避免两个临时文件互相覆盖顺序错乱
+        with self._write_lock:
+            try:
+                atomic_write_json(self.path, self._snapshot())
+            except Exception as e:
+                logger.error(f"写入 {self.path} 失败: {e}")
@@ -3,7 +3,13 @@ from core.api_client import BaiduApiClient
 from core.config_manager import ConfigManager
 from core.alert_manager import AlertManager, AlertType
 from core.theme_manager import ThemeManager
+from core.movers import MoverTracker
+from core.indicators import IndicatorEngine
+from core.history_store import HistoryStore
+from core.notifier import NotificationDispatcher
 import logging
+import time
+from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
@@ -49,8 +55,16 @@ class MonitorController(QObject):
     """
     Main controller linking UI, Config, and API.
     """
-    stock_data_updated = Signal(dict) # Emitted to UI
+    # 使用 object 而不是 dict：dict 会在每次 emit 时被深拷贝转换为 QVariantMap，
+    # 几十只股票带分时点时单次 emit 就要数十毫秒
+    stock_data_updated = Signal(object) # Emitted to UI, {code: {data...}}
+    quote_updated = Signal(str, object)  # code, data，逐只股票发出，供实时图表订阅
     alert_triggered = Signal(str, str, str)  # code, name, message
+
+    # 所有窗口隐藏超过 IDLE_DELAY 秒后进入空闲：全部自选股每 IDLE_INTERVAL 秒才获取一次，
+    # 有已启用提醒规则的股票仍按设置的刷新间隔获取并检查提醒
+    IDLE_DELAY = 60
+    IDLE_INTERVAL = 30
     
     def __init__(self):
         super().__init__()
@@ -58,6 +72,11 @@ class MonitorController(QObject):
         self.api_client = BaiduApiClient()
         self.alert_manager = AlertManager(self.config)
         self.theme_manager = ThemeManager(self.config)
+        self.movers = MoverTracker()
+        self.indicators = IndicatorEngine()
+        self.history = HistoryStore()
+        # 通知在独立线程中合并、限流后发送，不阻塞行情线程
+        self.notifier = NotificationDispatcher(self.alert_triggered.emit)
         self.timer = QTimer()
         
         # Setup worker thread for network 
@@ -70,12 +89,47 @@ class MonitorController(QObject):
         self.is_running = False
         self.is_paused = False
 
+        # 最新行情快照（整体替换，GUI 线程读取时无需加锁）
+        self.latest_data = {}
+        self.last_update_time = None
+
+        # 界面可见性：窗口隐藏时不再渲染，全部隐藏一段时间后只按正常频率检查提醒
+        self._active_views = set()
+        self._is_idle = False
+        self._last_full_fetch = 0.0  # 上次获取全部自选股的时间（time.monotonic）
+        self._idle_timer = QTimer()
+        self._idle_timer.setSingleShot(True)
+        self._idle_timer.timeout.connect(self._enter_idle)
+
     def start_monitoring(self):
-        interval = self.config.get_refresh_interval() * 1000
-        self.timer.start(interval)
+        self.timer.start(self.config.get_refresh_interval() * 1000)
         self.is_running = True
         self._on_timer_tick() # Immediate first run
 
+    def set_view_active(self, view, active):
+        """
+        窗口显示/隐藏时调用
+        view: 窗口标识，如 "main" / "mini"
+        """
+        if active:
+            self._active_views.add(view)
+            self._idle_timer.stop()
+            if self._is_idle:
+                self._is_idle = False
+                logger.info("界面恢复可见，恢复正常刷新")
+                if self.is_running:
+                    self._on_timer_tick()
+        else:
+            self._active_views.discard(view)
+            if not self._active_views and not self._is_idle:
+                self._idle_timer.start(self.IDLE_DELAY * 1000)
+
+    def _enter_idle(self):
+        if self._active_views:
+            return
+        self._is_idle = True
+        logger.info("界面已隐藏且空闲，只按正常频率检查有提醒规则的股票")
+
     def stop_monitoring(self):
         self.timer.stop()
         self.is_running = False
@@ -85,10 +139,21 @@ class MonitorController(QObject):
         if self.is_paused:
             return
 
+        codes = None
+        now = time.monotonic()
+        if self._is_idle and now - self._last_full_fetch < self.IDLE_INTERVAL:
+            # 空闲时提醒仍需及时：只获取有提醒规则的股票，不更新界面
+            watched = self.alert_manager.active_codes()
+            codes = [c for c in self.config.get_stocks() if c in watched]
+            if not codes:
+                return
+        else:
+            self._last_full_fetch = now
+
         # Simple implementation: Use a Thread class for the fetch job
         # Note: In production code we should reuse threads.
         import threading
-        t = threading.Thread(target=self._fetch_job)
+        t = threading.Thread(target=self._fetch_job, args=(codes,))
         t.daemon = True
         t.start()
 
@@ -98,11 +163,15 @@ class MonitorController(QObject):
         logger.info(f"Monitor paused: {self.is_paused}")
         return self.is_paused
 
-    def _fetch_job(self):
+    def _fetch_job(self, alert_codes=None):
+        """
+        alert_codes 为 None 时获取全部自选股并通知界面；
+        否则为空闲时的提醒检查，只获取这些股票，不发出界面更新信号
+        """
         if self.is_paused:
             return
 
-        codes = self.config.get_stocks()
+        codes = self.config.get_stocks() if alert_codes is None else alert_codes
         if not codes:
             logger.debug("No stocks to fetch")
             return
@@ -127,12 +196,24 @@ class MonitorController(QObject):
         # Emit signal from generic thread? Need to be careful with PySide
         # PySide6 Signals are thread-safe.
         if results:
-            self.stock_data_updated.emit(results)
+            # 先更新异动榜和指标，UI 收到信号时即可读取最新结果
+            self.indicators.update(results)
+            self.latest_data = {**self.latest_data, **results}
+            if alert_codes is None:
+                self.movers.update(results)
+                self.last_update_time = datetime.now()
+                self.stock_data_updated.emit(results)
+                for code, info in results.items():
+                    self.quote_updated.emit(code, info)
             
             # 检查提醒
-            triggered = self.alert_manager.check_alerts(results)
+            triggered = self.alert_manager.check_alerts(results, self.indicators)
             for rule, info in triggered:
-                self._send_notification(rule, info)
+                title, message = self._format_notification(rule, info)
+                self.notifier.submit(rule.code, info.get("name", rule.code), title, message)
+            
+            # 收盘后把当天分时写入本地历史（每只股票每天只写一次）
+            self.history.record(results)
 
     def add_stock(self, code):
         # First verify
@@ -147,6 +228,9 @@ class MonitorController(QObject):
 
     def remove_stock(self, code):
         self.config.remove_stock(code)
+        self.movers.remove(code)
+        self.indicators.remove(code)
+        self.latest_data = {k: v for k, v in self.latest_data.items() if k != code}
         # Update UI will happen next tick
 
     def move_stock(self, code, direction):
@@ -168,49 +252,36 @@ class MonitorController(QObject):
 
     def get_stocks_list(self):
         return self.config.get_stocks()
-    
-    def _send_notification(self, rule, info):
-        """发送系统通知"""
-        try:
-            from plyer import notification
-            
-            name = info.get("name", rule.code)
-            price = info.get("price", "--")
-            ratio = info.get("ratio", "--")
-            
-            # 构建提醒消息
-            if rule.alert_type == AlertType.PRICE_ABOVE:
-                title = f"📈 {name} 价格突破"
-                message = f"当前价格 {price} 已超过 {rule.threshold}"
-            elif rule.alert_type == AlertType.PRICE_BELOW:
-                title = f"📉 {name} 价格跌破"
-                message = f"当前价格 {price} 已低于 {rule.threshold}"
-            elif rule.alert_type == AlertType.CHANGE_ABOVE:
-                title = f"🚀 {name} 涨幅提醒"
-                message = f"当前涨幅 {ratio} 已超过 {rule.threshold}%"
-            elif rule.alert_type == AlertType.CHANGE_BELOW:
-                title = f"⚠️ {name} 跌幅提醒"
-                message = f"当前跌幅 {ratio} 已超过 {rule.threshold}%"
-            else:
-                title = f"📊 {name} 提醒"
-                message = f"价格: {price}, 涨跌幅: {ratio}"
-            
-            notification.notify(
-                title=title,
-                message=message,
-                app_name="股票监控助手",
-                timeout=10
-            )
-            
-            # 同时发送信号给 UI
-            self.alert_triggered.emit(rule.code, name, message)
-            logger.info(f"Notification sent: {title} - {message}")
-            
-        except ImportError:
-            logger.warning("plyer not installed, using fallback notification")
-            # 如果 plyer 不可用，通过信号通知 UI 显示
-            name = info.get("name", rule.code)
-            self.alert_triggered.emit(rule.code, name, f"提醒触发: {rule.alert_type.value}")
-        except Exception as e:
-            logger.error(f"Failed to send notification: {e}")
 
+    def get_watchlist(self):
+        """自选股快照（含版本号），用于 O(1) 判断成员和列表是否变化"""
+        return self.config.get_watchlist()
+    
+    def _format_notification(self, rule, info):
+        """构建提醒通知的标题和正文"""
+        name = info.get("name", rule.code)
+        price = info.get("price", "--")
+        ratio = info.get("ratio", "--")
+        
+        if rule.alert_type == AlertType.PRICE_ABOVE:
+            title = f"📈 {name} 价格突破"
+            message = f"当前价格 {price} 已超过 {rule.threshold}"
+        elif rule.alert_type == AlertType.PRICE_BELOW:
+            title = f"📉 {name} 价格跌破"
+            message = f"当前价格 {price} 已低于 {rule.threshold}"
+        elif rule.alert_type == AlertType.CHANGE_ABOVE:
+            title = f"🚀 {name} 涨幅提醒"
+            message = f"当前涨幅 {ratio} 已超过 {rule.threshold}%"
+        elif rule.alert_type == AlertType.CHANGE_BELOW:
+            title = f"⚠️ {name} 跌幅提醒"
+            message = f"当前跌幅 {ratio} 已超过 {rule.threshold}%"
+        elif rule.alert_type == AlertType.EXPRESSION:
+            title = f"🧮 {name} 条件提醒"
+            message = f"{rule.expression} 成立，价格: {price}, 涨跌幅: {ratio}"
+        else:
+            title = f"📊 {name} 提醒"
+            message = f"价格: {price}, 涨跌幅: {ratio}"
+        if rule.triggered_at:
+            # 轮询间隔内冲高回落时，当前价可能已回到阈值以内
+            message += f"（{rule.triggered_at} 触及）"
+        return title, message
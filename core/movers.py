@@ -0,0 +1,125 @@
+"""
+异动榜：涨幅榜 / 跌幅榜 / 量能异动
+排名用有序列表 + 二分维护，每批行情只更新发生变化的股票。
+"""
+import bisect
+import logging
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def parse_ratio(ratio) -> float:
+    """把 "+1.23%" 形式的涨跌幅解析为浮点数"""
+    try:
+        return float(str(ratio).replace("%", "").replace("+", ""))
+    except (ValueError, TypeError):
+        return 0.0
+
+
+class SortedRanking:
+    """
+    按分值升序维护的索引容器
+    code -> score 的字典用于 O(1) 找到旧分值，再二分定位到有序列表中的位置。
+    """
+
+    def __init__(self):
+        self._entries: List[Tuple[float, str]] = []
+        self._scores: Dict[str, float] = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, code):
+        return code in self._scores
+
+    def update(self, code: str, score: float) -> bool:
+        """更新分值，分值未变化时不做任何操作；返回是否有变化"""
+        old = self._scores.get(code)
+        if old == score:
+            return False
+        if old is not None:
+            index = bisect.bisect_left(self._entries, (old, code))
+            del self._entries[index]
+        bisect.insort(self._entries, (score, code))
+        self._scores[code] = score
+        return True
+
+    def remove(self, code: str):
+        old = self._scores.pop(code, None)
+        if old is not None:
+            index = bisect.bisect_left(self._entries, (old, code))
+            del self._entries[index]
+
+    def score(self, code: str) -> Optional[float]:
+        return self._scores.get(code)
+
+    def highest(self, n: int) -> List[Tuple[str, float]]:
+        return [(code, score) for score, code in reversed(self._entries[-n:])] if n > 0 else []
+
+    def lowest(self, n: int) -> List[Tuple[str, float]]:
+        return [(code, score) for score, code in self._entries[:n]]
+
+
+class MoverTracker:
+    """
+    异动榜数据
+    - gainers / losers: 按涨跌幅排名
+    - volume_spikes: 最近一分钟成交量相对前 N 分钟均量的倍数（量比）
+    """
+
+    VOLUME_WINDOW = 20
+
+    def __init__(self):
+        self._lock = Lock()
+        self._ratio = SortedRanking()
+        self._spike = SortedRanking()
+        self._names: Dict[str, str] = {}
+
+    def update(self, results: Dict[str, dict]):
+        """只更新本批次返回的股票"""
+        with self._lock:
+            for code, info in results.items():
+                self._names[code] = info.get("name", code)
+                self._ratio.update(code, parse_ratio(info.get("ratio", "0%")))
+
+                spike = self._volume_spike(info.get("points") or [])
+                if spike is None:
+                    self._spike.remove(code)
+                else:
+                    self._spike.update(code, spike)
+
+    def remove(self, code: str):
+        with self._lock:
+            self._ratio.remove(code)
+            self._spike.remove(code)
+            self._names.pop(code, None)
+
+    def _volume_spike(self, points) -> Optional[float]:
+        # 最后一个点是尚未走完的分钟，用倒数第二个点作为最新完整分钟
+        if len(points) < 3:
+            return None
+        window = points[-self.VOLUME_WINDOW - 2:-2]
+        total = sum(p.get("volume", 0) for p in window)
+        if total <= 0:
+            return None
+        return round(points[-2].get("volume", 0) * len(window) / total, 2)
+
+    def _named(self, items):
+        return [(code, self._names.get(code, code), score) for code, score in items]
+
+    def top_gainers(self, n: int) -> List[Tuple[str, str, float]]:
+        """涨幅前 n，返回 [(code, name, ratio), ...]"""
+        with self._lock:
+            return self._named([i for i in self._ratio.highest(n) if i[1] > 0])
+
+    def top_losers(self, n: int) -> List[Tuple[str, str, float]]:
+        """跌幅前 n，返回 [(code, name, ratio), ...]"""
+        with self._lock:
+            return self._named([i for i in self._ratio.lowest(n) if i[1] < 0])
+
+    def volume_spikes(self, n: int) -> List[Tuple[str, str, float]]:
+        """量比前 n，返回 [(code, name, 倍数), ...]"""
+        with self._lock:
+            return self._named(self._spike.highest(n))
@@ -0,0 +1,119 @@
+"""
+系统通知分发
+行情线程只把提醒放入队列立即返回，由独立的工作线程发送：
+- 第一条提醒到达后再等待 window 秒，期间到达的提醒合并成一条摘要通知
+- 同一只股票在 cooldown 秒内只弹出一次系统通知，其余只记录日志
+- plyer 在第一次发送时导入一次，未安装时只通过回调交给界面
+"""
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+APP_NAME = "股票监控助手"
+
+
+class NotificationDispatcher:
+    """
+    通知队列 + 工作线程
+    on_alert(code, name, message) 对每条提醒都会在工作线程中调用（不受冷却限制），
+    供控制器转发给界面。
+    """
+
+    # 摘要通知最多列出的条数，系统通知正文长度有限
+    SUMMARY_LINES = 5
+
+    def __init__(self, on_alert: Optional[Callable[[str, str, str], None]] = None,
+                 window: float = 2.0, cooldown: float = 60.0):
+        self._on_alert = on_alert
+        self._window = window
+        self._cooldown = cooldown
+        self._queue = queue.Queue()
+        self._last_sent: Dict[str, float] = {}  # code -> 上次弹出系统通知的时间
+        self._backend = None  # None: 尚未导入；False: 不可用
+        self._thread = threading.Thread(target=self._run, name="notifier")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def submit(self, code: str, name: str, title: str, message: str):
+        """放入队列，立即返回"""
+        self._queue.put((code, name, title, message))
+
+    def stop(self):
+        self._queue.put(None)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self._window
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._deliver(batch)
+                    return
+                batch.append(item)
+            self._deliver(batch)
+
+    def _deliver(self, batch: List[Tuple[str, str, str, str]]):
+        now = time.monotonic()
+        outgoing = []
+        for code, name, title, message in batch:
+            if self._on_alert is not None:
+                try:
+                    self._on_alert(code, name, message)
+                except RuntimeError:
+                    # 接收方已销毁（退出过程中）
+                    pass
+            last = self._last_sent.get(code)
+            if last is not None and now - last < self._cooldown:
+                logger.info(f"[{code}] 通知冷却中，跳过: {title} - {message}")
+                continue
+            outgoing.append((code, title, message))
+
+        # 同一批次内同一只股票只占一次冷却，但多条规则都列出
+        for code, _, _ in outgoing:
+            self._last_sent[code] = now
+
+        if not outgoing:
+            return
+        if len(outgoing) == 1:
+            _, title, message = outgoing[0]
+        else:
+            title = f"🔔 {len(outgoing)} 条提醒"
+            lines = [f"{t}：{m}" for _, t, m in outgoing[:self.SUMMARY_LINES]]
+            if len(outgoing) > self.SUMMARY_LINES:
+                lines.append(f"……等 {len(outgoing)} 条")
+            message = "\n".join(lines)
+        self._notify(title, message)
+
+    def _notify(self, title: str, message: str):
+        backend = self._load_backend()
+        if not backend:
+            return
+        try:
+            backend.notify(title=title, message=message, app_name=APP_NAME, timeout=10)
+            logger.info(f"Notification sent: {title} - {message}")
+        except Exception as e:
+            logger.error(f"Failed to send notification: {e}")
+
+    def _load_backend(self):
+        if self._backend is None:
+            try:
+                from plyer import notification
+                self._backend = notification
+            except ImportError:
+                logger.warning("plyer not installed, notifications are shown in the UI only")
+                self._backend = False
+        return self._backend
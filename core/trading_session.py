@@ -0,0 +1,193 @@
+"""
+交易时段与分时数据对齐
+把 API 返回的分时点映射到固定的分钟槽位上，供分时图、对比图等共用。
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+def get_market_type(code: str) -> str:
+    """根据股票代码判断市场：港股 5 位且以 0 开头，其余按 A 股处理"""
+    code = str(code)
+    if code.startswith("0") and len(code) == 5:
+        return "HK"
+    return "A"
+
+
+@lru_cache(maxsize=None)
+def get_time_slots(market: str) -> Tuple[str, ...]:
+    """
+    生成标准分钟时间轴
+    A股: 9:30-11:30, 13:00-15:00 (共 242 个槽位)
+    港股: 9:30-12:00, 13:00-16:00 (共 332 个槽位)
+    """
+    slots = []
+    if market == "HK":
+        # Morning: 9:30 - 12:00
+        for m in range(30, 60): slots.append(f"09:{m:02d}")
+        for h in range(10, 12):
+            for m in range(60): slots.append(f"{h:02d}:{m:02d}")
+        slots.append("12:00")
+        # Afternoon: 13:00 - 16:00
+        for h in range(13, 16):
+            for m in range(60): slots.append(f"{h:02d}:{m:02d}")
+        slots.append("16:00")
+    else:
+        # Morning: 9:30 - 11:30
+        for m in range(30, 60): slots.append(f"09:{m:02d}")
+        for m in range(60): slots.append(f"10:{m:02d}")
+        for m in range(30): slots.append(f"11:{m:02d}")
+        slots.append("11:30")
+        # Afternoon: 13:00 - 15:00
+        for h in range(13, 15):
+            for m in range(60): slots.append(f"{h:02d}:{m:02d}")
+        slots.append("15:00")
+    return tuple(slots)
+
+
+@lru_cache(maxsize=None)
+def get_slot_index(market: str) -> Dict[str, int]:
+    """时间字符串 -> 槽位下标"""
+    return {t: i for i, t in enumerate(get_time_slots(market))}
+
+
+@lru_cache(maxsize=None)
+def get_axis_ticks(market: str) -> List[Tuple[int, str]]:
+    """X 轴刻度 [(槽位下标, 标签), ...]"""
+    if market == "HK":
+        key_times = ["09:30", "10:30", "11:30", "13:00", "14:00", "15:00"]
+    else:
+        # 11:30 与 13:00 相邻，只显示 11:30 避免重叠
+        key_times = ["09:30", "10:30", "11:30", "14:00", "15:00"]
+    index = get_slot_index(market)
+    return [(index[t], t) for t in key_times if t in index]
+
+
+def _current_slot(last_time: str, market: str, point_count: int) -> int:
+    """最新数据点所在槽位，时间不在时间轴上时做容错"""
+    slots = get_time_slots(market)
+    index = get_slot_index(market)
+    if last_time in index:
+        return index[last_time]
+    # 收盘后的时间归到最后一个槽位，开盘前归到第一个
+    if last_time > slots[-1]:
+        return len(slots) - 1
+    if last_time < slots[0]:
+        return 0
+    return min(point_count - 1, len(slots) - 1)
+
+
+@dataclass
+class AlignedSeries:
+    """
+    对齐到分钟槽位的分时序列
+    所有数组长度都等于时间轴槽位数，未到达或首个数据点之前的槽位为 NaN；
+    槽位间缺失的分钟用前值填充（成交量、成交额填 0）。
+    [first, last] 为有效槽位区间，first > last 表示没有数据。
+    """
+    market: str
+    pre_close: float
+    price: np.ndarray
+    avg_price: np.ndarray
+    change: np.ndarray
+    change_pct: np.ndarray
+    volume: np.ndarray
+    amount: np.ndarray
+    first: int = 0
+    last: int = -1
+    first_timestamp: int = 0
+
+    @property
+    def is_empty(self) -> bool:
+        return self.first > self.last
+
+    @property
+    def x(self) -> np.ndarray:
+        return np.arange(self.first, self.last + 1)
+
+    def valid(self, name: str) -> np.ndarray:
+        """取某一列的有效区间"""
+        return getattr(self, name)[self.first:self.last + 1]
+
+    def merge_points(self, points) -> Optional[int]:
+        """
+        增量合并最新的分时点列表
+        只写入不早于当前最后槽位的点：最后一根就地更新，新分钟追加在后面，
+        更早的槽位不会被修改。
+        返回: 被修改的起始槽位；没有变化返回 -1；
+              无法增量合并（无数据、已换日）时返回 None，调用方应整体重建
+        """
+        if self.is_empty or not points or points[0].get("timestamp", 0) != self.first_timestamp:
+            return None
+
+        index = get_slot_index(self.market)
+        tail = []
+        for p in reversed(points):
+            i = index.get(p["time"], -1)
+            if i < 0:
+                continue
+            if i < self.last:
+                break
+            tail.append((i, p))
+        if not tail:
+            return -1
+
+        start = self.last
+        for i, p in reversed(tail):
+            if i > self.last + 1:
+                # 缺失的分钟用前值填充
+                for column in (self.price, self.avg_price, self.change, self.change_pct):
+                    column[self.last + 1:i] = column[self.last]
+            self.price[i] = p["price"]
+            self.avg_price[i] = p.get("avg_price", 0)
+            self.change[i] = p.get("change", 0)
+            self.change_pct[i] = p.get("change_pct", 0)
+            self.volume[i] = p.get("volume", 0)
+            self.amount[i] = p.get("amount", 0)
+            self.last = max(self.last, i)
+        return start
+
+
+def align_points(points, code: str, pre_close: float, market: Optional[str] = None) -> AlignedSeries:
+    """
+    把分时点列表对齐到市场时间轴
+    market: 指定时间轴（跨市场对比时统一到同一时间轴），默认按代码判断
+    """
+    market = market or get_market_type(code)
+    size = len(get_time_slots(market))
+    columns = {name: np.full(size, np.nan) for name in ("price", "avg_price", "change", "change_pct")}
+    volume = np.zeros(size)
+    amount = np.zeros(size)
+
+    if not points:
+        return AlignedSeries(market, pre_close, volume=volume, amount=amount, **columns)
+
+    current = _current_slot(points[-1]["time"], market, len(points))
+    index = get_slot_index(market)
+    idx = np.fromiter((index.get(p["time"], -1) for p in points), dtype=np.int64, count=len(points))
+    keep = (idx >= 0) & (idx <= current)
+    idx = idx[keep]
+    if idx.size == 0:
+        return AlignedSeries(market, pre_close, volume=volume, amount=amount, **columns)
+
+    kept = [p for p, k in zip(points, keep) if k]
+    columns["price"][idx] = [p["price"] for p in kept]
+    columns["avg_price"][idx] = [p.get("avg_price", 0) for p in kept]
+    columns["change"][idx] = [p.get("change", 0) for p in kept]
+    columns["change_pct"][idx] = [p.get("change_pct", 0) for p in kept]
+    volume[idx] = [p.get("volume", 0) for p in kept]
+    amount[idx] = [p.get("amount", 0) for p in kept]
+
+    first = int(idx.min())
+    # 前值填充：每个槽位取不晚于自身的最近有效槽位
+    filled = np.zeros(size, dtype=bool)
+    filled[idx] = True
+    source = np.maximum.accumulate(np.where(filled, np.arange(size), 0))
+    for name, column in columns.items():
+        column[first:current + 1] = column[source[first:current + 1]]
+
+    return AlignedSeries(market, pre_close, volume=volume, amount=amount, first=first, last=current,
+                         first_timestamp=points[0].get("timestamp", 0), **columns)
@@ -0,0 +1,99 @@
+"""
+分价成交量（成交量按价格区间分布）
+价格区间的宽度按昨收的固定比例划分，新价格超出已有范围时只扩展数组，不需要重新分桶。
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+
+from core.trading_session import AlignedSeries
+
+
+class VolumeProfile:
+    """
+    跟随一条 AlignedSeries 增量维护的分价成交量
+    merge_points 只会就地修改原最后一个槽位并在其后追加，
+    所以每次只需撤销上次最后一个槽位的贡献，再累加从它开始的新槽位。
+    """
+
+    def __init__(self, step_ratio: float = 0.001, min_step: float = 0.01):
+        self._step_ratio = step_ratio
+        self._min_step = min_step
+        self._series: Optional[AlignedSeries] = None
+        self._base_pre_close = None
+        self._reset()
+
+    def _reset(self):
+        self.step = 0.0
+        self._base = 0.0
+        self._origin = 0  # _volumes[0] 对应的桶编号
+        self._volumes = np.zeros(0)
+        self._applied_last = -1  # 已累加到的最后槽位
+        self._last_contribution = (0, 0.0)  # (桶编号, 成交量)，该槽位可能被就地更新
+
+    @property
+    def is_empty(self) -> bool:
+        return self._applied_last < 0
+
+    def update(self, series: AlignedSeries) -> bool:
+        """同步到 series 的最新状态，返回分布是否有变化"""
+        if series is not self._series or series.pre_close != self._base_pre_close:
+            self._series = series
+            self._base_pre_close = series.pre_close
+            self._reset()
+            if series.is_empty:
+                return True
+            base = series.pre_close if series.pre_close > 0 else float(series.price[series.first])
+            self._base = base
+            self.step = max(round(base * self._step_ratio, 2), self._min_step)
+            self._accumulate(series, series.first)
+            return True
+
+        if series.is_empty:
+            return False
+
+        start = self._applied_last
+        bucket, volume = self._last_contribution
+        if series.last == start and self._bucket(series.price[start]) == bucket and series.volume[start] == volume:
+            return False
+        self._volumes[bucket - self._origin] -= volume
+        self._accumulate(series, start)
+        return True
+
+    def _bucket(self, prices):
+        return np.rint((np.asarray(prices) - self._base) / self.step).astype(np.int64)
+
+    def _accumulate(self, series: AlignedSeries, start: int):
+        """累加 [start, series.last] 槽位的成交量"""
+        end = series.last + 1
+        buckets = self._bucket(series.price[start:end])
+        volumes = series.volume[start:end]
+
+        low, high = int(buckets.min()), int(buckets.max())
+        if self._volumes.size == 0:
+            self._origin = low
+            self._volumes = np.zeros(high - low + 1)
+        else:
+            pad_low = max(self._origin - low, 0)
+            pad_high = max(high - (self._origin + self._volumes.size - 1), 0)
+            if pad_low or pad_high:
+                self._volumes = np.pad(self._volumes, (pad_low, pad_high))
+                self._origin -= pad_low
+
+        np.add.at(self._volumes, buckets - self._origin, volumes)
+        self._applied_last = series.last
+        self._last_contribution = (int(buckets[-1]), float(volumes[-1]))
+
+    def histogram(self) -> Tuple[np.ndarray, np.ndarray]:
+        """返回 (各价格区间中心价, 成交量)，只包含有成交的区间"""
+        if self.is_empty:
+            return np.zeros(0), np.zeros(0)
+        nonzero = np.flatnonzero(self._volumes > 0)
+        prices = self._base + (nonzero + self._origin) * self.step
+        return prices, self._volumes[nonzero]
+
+    def point_of_control(self) -> Optional[float]:
+        """成交最密集的价格"""
+        if self.is_empty or not self._volumes.any():
+            return None
+        return self._base + (int(np.argmax(self._volumes)) + self._origin) * self.step
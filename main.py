@@ -8,6 +8,7 @@ from PySide6.QtCore import Signal, QObject
 from core.monitor_controller import MonitorController
 from ui.mini_window import MiniWindow
 from ui.main_window import MainWindow
+from ui.tray_summary import TraySummary
 
 # Hotkey Listener Helper for Thread Safety
 class HotkeyListener(QObject):
@@ -102,73 +103,110 @@ def main():
 
     controller = MonitorController()
     
-    mini_win = MiniWindow(controller)
-    main_win = MainWindow(controller)
-    
     # Hotkey Handler
     hotkey_listener = HotkeyListener(controller.config)
     
     # --- System Tray ---
+    tray_icon = create_tray_icon()
     tray = QSystemTrayIcon()
-    tray.setIcon(create_tray_icon())
+    tray.setIcon(tray_icon)
     tray.setVisible(True)
+    tray_summary = TraySummary(controller, tray, tray_icon)
     
     tray_menu = QMenu()
     
     action_show_main = tray_menu.addAction("打开主界面")
     action_show_mini = tray_menu.addAction("显示悬浮窗")
+    action_tray_only = tray_menu.addAction("仅托盘运行")
     tray_menu.addSeparator()
     action_quit = tray_menu.addAction("退出")
     
     tray.setContextMenu(tray_menu)
 
+    # --- Windows (created lazily, destroyed in tray-only mode) ---
+    windows = {"main": None, "mini": None}
+
+    def get_main_win():
+        if windows["main"] is None:
+            main_win = MainWindow(controller)
+            main_win.switch_to_mini.connect(show_mini)
+            # When settings change, reload hotkeys
+            main_win.settings_changed.connect(hotkey_listener.reload)
+            windows["main"] = main_win
+        return windows["main"]
+
+    def get_mini_win():
+        if windows["mini"] is None:
+            mini_win = MiniWindow(controller)
+            mini_win.switch_to_expanded.connect(show_main)
+            mini_win.close_app.connect(quit_app)
+            windows["mini"] = mini_win
+        return windows["mini"]
+
+    def is_shown(win):
+        return win is not None and win.isVisible() and not win.isMinimized()
+
     # --- Logic ---
 
     def show_mini():
         # Hide Main, Show Mini
-        main_win.hide()
-        mini_win.show()
+        tray_summary.set_enabled(False)
+        if windows["main"]:
+            windows["main"].hide()
+        get_mini_win().show()
         # Save config
         controller.config.update_window_settings("mode", "mini")
 
     def show_main():
         # Hide Mini, Show Main
-        mini_win.hide()
+        tray_summary.set_enabled(False)
+        if windows["mini"]:
+            windows["mini"].hide()
+        main_win = get_main_win()
         main_win.show()
         main_win.activateWindow()
         controller.config.update_window_settings("mode", "expanded")
+
+    def enter_tray_mode():
+        """仅托盘运行：彻底销毁两个窗口，行情只显示在托盘提示和图标上"""
+        for key, win in windows.items():
+            if win is not None:
+                win.hide()
+                win.deleteLater()
+                windows[key] = None
+        tray_summary.set_enabled(True)
+        controller.config.update_window_settings("mode", "tray")
+
+    def show_by_config():
+        config_mode = controller.config.get_window_settings().get("mode", "expanded")
+        if config_mode == "mini":
+            show_mini()
+        else:
+            show_main()
     
     def switch_mode():
         """Switch between Mini and Expanded"""
-        if main_win.isVisible() and not main_win.isMinimized():
+        if is_shown(windows["main"]):
             show_mini()
-        elif mini_win.isVisible() and not mini_win.isMinimized():
+        elif is_shown(windows["mini"]):
             show_main()
         else:
             # If nothing is visible (hidden state or maximized?), default to main?
             # Or restore based on config?
-            config_mode = controller.config.get_window_settings().get("mode", "expanded")
-            if config_mode == "mini":
-                show_mini()
-            else:
-                show_main()
+            show_by_config()
 
     def toggle_visibility():
         """Handle Global Hotkey Toggle"""
-        is_visible = (main_win.isVisible() and not main_win.isMinimized()) or \
-                     (mini_win.isVisible() and not mini_win.isMinimized())
+        is_visible = is_shown(windows["main"]) or is_shown(windows["mini"])
         
         if is_visible:
             # Hide all
-            main_win.hide()
-            mini_win.hide()
+            for win in windows.values():
+                if win is not None:
+                    win.hide()
         else:
             # Show based on last config
-            config_mode = controller.config.get_window_settings().get("mode", "expanded")
-            if config_mode == "mini":
-                show_mini()
-            else:
-                show_main()
+            show_by_config()
 
     def on_tray_activated(reason):
         if reason == QSystemTrayIcon.Trigger:
@@ -182,30 +220,27 @@ def main():
     tray.activated.connect(on_tray_activated)
     action_show_main.triggered.connect(show_main)
     action_show_mini.triggered.connect(show_mini)
+    action_tray_only.triggered.connect(enter_tray_mode)
     action_quit.triggered.connect(quit_app)
     
     hotkey_listener.toggle_requested.connect(toggle_visibility)
     hotkey_listener.switch_mode_requested.connect(switch_mode)
     
-    # When settings change, reload hotkeys
-    main_win.settings_changed.connect(hotkey_listener.reload)
-
-    # Window signals
-    mini_win.switch_to_expanded.connect(show_main)
-    mini_win.close_app.connect(quit_app)
-    
-    main_win.switch_to_mini.connect(show_mini)
-    
     # Startup
     config_mode = controller.config.get_window_settings().get("mode", "expanded")
     controller.start_monitoring()
     
-    if config_mode == "mini":
-        show_mini()
+    if config_mode == "tray":
+        enter_tray_mode()
     else:
-        show_main()
-
-    sys.exit(app.exec())
+        show_by_config()
+
+    exit_code = app.exec()
+    # 事件循环结束后再写盘：退出时关闭窗口也会修改配置（窗口位置），
+    # flush 会等待后台线程正在进行的写入并停止线程，之后的修改改为同步写盘
+    controller.alert_manager.flush()
+    controller.config.flush()
+    sys.exit(exit_code)
 
 if __name__ == "__main__":
     main()
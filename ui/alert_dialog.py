@@ -3,11 +3,13 @@
 """
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, 
-    QComboBox, QDoubleSpinBox, QListWidget, QListWidgetItem,
-    QGroupBox, QMessageBox, QWidget
+    QComboBox, QDoubleSpinBox, QSpinBox, QListWidget, QListWidgetItem,
+    QGroupBox, QMessageBox, QWidget, QLineEdit
 )
 from PySide6.QtCore import Qt
 from core.alert_manager import AlertRule, AlertType
+from core.alert_expr import SERIES_FIELDS, SCALAR_FIELDS, validate_expression
+from core.indicators import INDICATOR_FIELDS
 
 
 class AlertDialog(QDialog):
@@ -33,7 +35,9 @@ class AlertDialog(QDialog):
         
         # 添加新规则区域
         add_group = QGroupBox("添加提醒规则")
-        add_layout = QHBoxLayout(add_group)
+        group_layout = QVBoxLayout(add_group)
+        add_layout = QHBoxLayout()
+        group_layout.addLayout(add_layout)
         
         # 类型选择
         self.type_combo = QComboBox()
@@ -41,8 +45,21 @@ class AlertDialog(QDialog):
         self.type_combo.addItem("价格低于", AlertType.PRICE_BELOW)
         self.type_combo.addItem("涨幅超过", AlertType.CHANGE_ABOVE)
         self.type_combo.addItem("跌幅超过", AlertType.CHANGE_BELOW)
+        self.type_combo.addItem("表达式", AlertType.EXPRESSION)
         add_layout.addWidget(self.type_combo)
         
+        # 表达式输入（仅表达式类型显示）
+        self.expr_edit = QLineEdit()
+        self.expr_edit.setPlaceholderText("如 price > avg_price * 1.02 and volume_1m > 3 * mean(volume_1m, 20)")
+        self.expr_edit.setToolTip(
+            "可用变量: " + ", ".join(list(SERIES_FIELDS) + list(SCALAR_FIELDS)) + "\n"
+            "指标变量: " + ", ".join(INDICATOR_FIELDS) + "\n"
+            "窗口函数: mean/max/min/sum/std(序列变量, 分钟数)，序列变量为 " + ", ".join(SERIES_FIELDS) + "\n"
+            "运算: + - * / > >= < <= == != and or not abs()"
+        )
+        self.expr_edit.setVisible(False)
+        add_layout.addWidget(self.expr_edit, 1)
+        
         # 阈值输入
         self.threshold_spin = QDoubleSpinBox()
         self.threshold_spin.setRange(0, 99999)
@@ -60,6 +77,27 @@ class AlertDialog(QDialog):
         add_btn.clicked.connect(self._add_rule)
         add_layout.addWidget(add_btn)
         
+        # 自动重新启用（滞后带）：回撤或到时间后恢复，避免在阈值附近反复提醒
+        rearm_layout = QHBoxLayout()
+        rearm_layout.addWidget(QLabel("自动恢复: 回撤"))
+        self.rearm_pct_spin = QDoubleSpinBox()
+        self.rearm_pct_spin.setRange(0, 100)
+        self.rearm_pct_spin.setDecimals(2)
+        self.rearm_pct_spin.setSpecialValueText("不启用")
+        self.rearm_pct_spin.setToolTip("触发后价格回撤超过该比例（涨跌幅类为百分点）时重新启用，0 为不启用")
+        rearm_layout.addWidget(self.rearm_pct_spin)
+        self.rearm_unit_label = QLabel("%")
+        rearm_layout.addWidget(self.rearm_unit_label)
+        rearm_layout.addWidget(QLabel("或"))
+        self.rearm_minutes_spin = QSpinBox()
+        self.rearm_minutes_spin.setRange(0, 240)
+        self.rearm_minutes_spin.setSpecialValueText("不启用")
+        self.rearm_minutes_spin.setToolTip("触发后经过该分钟数重新启用，0 为不启用")
+        rearm_layout.addWidget(self.rearm_minutes_spin)
+        rearm_layout.addWidget(QLabel("分钟后"))
+        rearm_layout.addStretch()
+        group_layout.addLayout(rearm_layout)
+        
         layout.addWidget(add_group)
         
         # 类型变化时更新单位
@@ -93,13 +131,25 @@ class AlertDialog(QDialog):
         rules_layout.addLayout(btn_layout)
         layout.addWidget(rules_group)
     
+    def refresh_from_store(self):
+        """复用已有对话框时调用：重新读取规则"""
+        self._load_rules()
+    
     def _update_unit(self):
         """更新单位显示"""
         alert_type = self.type_combo.currentData()
+        is_expression = alert_type == AlertType.EXPRESSION
+        self.expr_edit.setVisible(is_expression)
+        self.threshold_spin.setVisible(not is_expression)
+        self.unit_label.setVisible(not is_expression)
+        # 表达式没有阈值，只能按时间恢复
+        self.rearm_pct_spin.setEnabled(not is_expression)
         if alert_type in (AlertType.PRICE_ABOVE, AlertType.PRICE_BELOW):
             self.unit_label.setText("元")
+            self.rearm_unit_label.setText("%")
         else:
             self.unit_label.setText("%")
+            self.rearm_unit_label.setText("个百分点")
     
     def _load_rules(self):
         """加载当前股票的规则"""
@@ -127,8 +177,20 @@ class AlertDialog(QDialog):
         }
         
         unit = "元" if rule.alert_type in (AlertType.PRICE_ABOVE, AlertType.PRICE_BELOW) else "%"
-        status = " [已触发]" if rule.triggered else ""
-        
+        if rule.triggered:
+            status = f" [已触发 {rule.triggered_at}]" if rule.triggered_at else " [已触发]"
+        else:
+            status = ""
+        rearm = []
+        if rule.rearm_pct > 0 and rule.alert_type != AlertType.EXPRESSION:
+            rearm.append(f"回撤{rule.rearm_pct:g}{'%' if unit == '元' else '个百分点'}")
+        if rule.rearm_minutes > 0:
+            rearm.append(f"{rule.rearm_minutes}分钟")
+        if rearm:
+            status += f" ({'/'.join(rearm)}后自动恢复)"
+        
+        if rule.alert_type == AlertType.EXPRESSION:
+            return f"表达式 {rule.expression}{status}"
         return f"{type_names.get(rule.alert_type, '未知')} {rule.threshold}{unit}{status}"
     
     def _add_rule(self):
@@ -136,6 +198,24 @@ class AlertDialog(QDialog):
         alert_type = self.type_combo.currentData()
         threshold = self.threshold_spin.value()
         
+        if alert_type == AlertType.EXPRESSION:
+            expression = self.expr_edit.text().strip()
+            error = validate_expression(expression)
+            if error:
+                QMessageBox.warning(self, "提示", f"表达式无效: {error}")
+                return
+            rule = AlertRule(
+                code=self.stock_code,
+                alert_type=alert_type,
+                threshold=0,
+                expression=expression,
+                rearm_minutes=self.rearm_minutes_spin.value()
+            )
+            self.controller.alert_manager.add_rule(rule)
+            self.expr_edit.clear()
+            self._load_rules()
+            return
+        
         if threshold <= 0:
             QMessageBox.warning(self, "提示", "请输入有效的阈值")
             return
@@ -143,7 +223,9 @@ class AlertDialog(QDialog):
         rule = AlertRule(
             code=self.stock_code,
             alert_type=alert_type,
-            threshold=threshold
+            threshold=threshold,
+            rearm_pct=self.rearm_pct_spin.value(),
+            rearm_minutes=self.rearm_minutes_spin.value()
         )
         
         self.controller.alert_manager.add_rule(rule)
@@ -156,7 +238,8 @@ class AlertDialog(QDialog):
             return
         
         rule = item.data(Qt.UserRole)
-        self.controller.alert_manager.remove_rule(rule.code, rule.alert_type)
+        expression = rule.expression if rule.alert_type == AlertType.EXPRESSION else None
+        self.controller.alert_manager.remove_rule(rule.code, rule.alert_type, expression)
         self._load_rules()
     
     def _reset_triggered(self):
@@ -1,22 +1,41 @@
 """
 分时走势图对话框
 """
+import threading
+import logging
+
+import numpy as np
+
 from PySide6.QtWidgets import (
-    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QApplication
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QCheckBox, QComboBox
 )
-from PySide6.QtCore import Qt, QTimer
-from PySide6.QtGui import QColor
+from PySide6.QtCore import Qt, Signal, QEvent
+
+from core.trading_session import get_market_type, get_time_slots, get_axis_ticks
+from core.history_store import trading_day
+from core.bars import TIMEFRAMES, BarAggregator, get_bar_layout
+from core.volume_profile import VolumeProfile
+from core.indicators import describe
 
 try:
     import pyqtgraph as pg
+    from ui.intraday_plot import IntradayCurves, CandlestickItem
     HAS_PYQTGRAPH = True
 except ImportError:
     HAS_PYQTGRAPH = False
 
+logger = logging.getLogger(__name__)
+
+# 多日分时视图显示的交易日数（含当天）
+HISTORY_DAYS = 5
+
 
 class ChartDialog(QDialog):
     """分时走势图对话框"""
     
+    # 后台线程加载完成后通过信号回到 GUI 线程
+    minute_data_loaded = Signal(object)
+    
     def __init__(self, controller, stock_code: str, stock_name: str, parent=None):
         super().__init__(parent)
         self.controller = controller
@@ -28,8 +47,17 @@ class ChartDialog(QDialog):
         self.resize(700, 450)
         self.setStyleSheet(self.controller.theme_manager.get_style())
         
+        self._loading = False
+        self._live_connected = False
+        self._timeframe = 0  # 0 为分时，正数为 K 线周期（分钟），负数为多日分时
+        self._history_days = []  # 多日视图中的 [(交易日, 序列), ...]
+        self._history_cache = None  # 多日视图中过去几天的拼接结果，切换到多日视图时读取一次
+        self.bars = BarAggregator()
+        self.profile = VolumeProfile()
+        self.minute_data_loaded.connect(self._on_minute_data_loaded)
+        
         self._setup_ui()
-        self._load_data()
+        self._load_initial()
     
     def _setup_ui(self):
         layout = QVBoxLayout(self)
@@ -71,7 +99,25 @@ class ChartDialog(QDialog):
             self.plot_widget.getAxis('left').setTextPen(text_pen)
             self.plot_widget.getAxis('bottom').setTextPen(text_pen)
             
-            layout.addWidget(self.plot_widget)
+            # 右侧分价成交量，与分时图共用 Y 轴
+            self.profile_widget = pg.PlotWidget()
+            self.profile_widget.setBackground(self.theme['APP_BG'])
+            self.profile_widget.setFixedWidth(110)
+            self.profile_widget.setMenuEnabled(False)
+            self.profile_widget.setMouseEnabled(x=False, y=False)
+            self.profile_widget.hideButtons()
+            self.profile_widget.hideAxis('left')
+            self.profile_widget.getAxis('bottom').setPen(axis_pen)
+            self.profile_widget.getAxis('bottom').setTextPen(text_pen)
+            self.profile_widget.getAxis('bottom').setStyle(showValues=False)
+            self.profile_widget.setYLink(self.plot_widget)
+            
+            self._create_plot_items()
+            chart_layout = QHBoxLayout()
+            chart_layout.setSpacing(0)
+            chart_layout.addWidget(self.plot_widget)
+            chart_layout.addWidget(self.profile_widget)
+            layout.addLayout(chart_layout)
         else:
             # 没有 pyqtgraph 时显示提示
             no_chart_label = QLabel("需要安装 pyqtgraph 才能显示图表\npip install pyqtgraph")
@@ -87,10 +133,40 @@ class ChartDialog(QDialog):
         self.status_label.setStyleSheet("font-size: 11px;")
         btn_layout.addWidget(self.status_label)
         
+        # 流式指标（MA / RSI / 波动率 / 量能 Z 分数），随行情刷新
+        self.indicator_label = QLabel("")
+        self.indicator_label.setProperty("class", "text-secondary")
+        self.indicator_label.setStyleSheet("font-size: 11px;")
+        btn_layout.addWidget(self.indicator_label)
+        
         btn_layout.addStretch()
         
+        self.timeframe_combo = QComboBox()
+        self.timeframe_combo.addItem("分时", 0)
+        for minutes in TIMEFRAMES:
+            self.timeframe_combo.addItem(f"{minutes}分", minutes)
+        self.timeframe_combo.addItem(f"{HISTORY_DAYS}日", -HISTORY_DAYS)
+        self.timeframe_combo.setToolTip("切换分时 / 分钟 K 线 / 多日分时")
+        self.timeframe_combo.currentIndexChanged.connect(self._on_timeframe_changed)
+        self.timeframe_combo.setEnabled(HAS_PYQTGRAPH)
+        btn_layout.addWidget(self.timeframe_combo)
+        
+        self.profile_check = QCheckBox("分价")
+        self.profile_check.setChecked(HAS_PYQTGRAPH)
+        self.profile_check.setEnabled(HAS_PYQTGRAPH)
+        self.profile_check.setToolTip("显示分价成交量")
+        self.profile_check.toggled.connect(self._on_profile_toggled)
+        btn_layout.addWidget(self.profile_check)
+        
+        self.live_check = QCheckBox("实时")
+        self.live_check.setChecked(True)
+        self.live_check.setToolTip("跟随行情刷新实时追加分时数据")
+        self.live_check.toggled.connect(self._set_live)
+        btn_layout.addWidget(self.live_check)
+        
         refresh_btn = QPushButton("🔄 刷新")
         refresh_btn.clicked.connect(self._load_data)
+        self.refresh_btn = refresh_btn
         btn_layout.addWidget(refresh_btn)
         
         close_btn = QPushButton("关闭")
@@ -99,27 +175,65 @@ class ChartDialog(QDialog):
         
         layout.addLayout(btn_layout)
     
+    def _load_initial(self):
+        """打开时优先使用控制器上一轮已获取的分时数据，没有时再后台加载"""
+        info = self.controller.latest_data.get(self.stock_code)
+        if info and info.get("points"):
+            self._apply_data(info.get("points", []), info.get("preClose", 0))
+        else:
+            self._load_data()
+    
+    def refresh_from_store(self):
+        """复用已有对话框时调用：用控制器的最新快照刷新"""
+        self._load_initial()
+    
     def _load_data(self):
-        """加载分时数据"""
+        """在后台线程加载分时数据，界面先显示占位提示"""
+        if self._loading:
+            return
+        self._loading = True
+        self.refresh_btn.setEnabled(False)
         self.status_label.setText("加载中...")
-        QApplication.processEvents()
         
-        result = self.controller.api_client.fetch_minute_data(self.stock_code)
+        t = threading.Thread(target=self._fetch_job, args=(self.stock_code,))
+        t.daemon = True
+        t.start()
+    
+    def _fetch_job(self, code):
+        result = self.controller.api_client.fetch_minute_data(code)
+        try:
+            self.minute_data_loaded.emit(result)
+        except RuntimeError:
+            # 对话框已被销毁
+            logger.debug(f"[{code}] Chart dialog closed before data arrived")
+    
+    def _on_minute_data_loaded(self, result):
+        self._loading = False
+        self.refresh_btn.setEnabled(True)
         
         if not result.get("success"):
             self.status_label.setText(f"加载失败: {result.get('error', '未知错误')}")
             return
         
         data = result["data"]
-        points = data.get("points", [])
-        pre_close = data.get("preClose", 0)
-        
+        self._apply_data(data.get("points", []), data.get("preClose", 0))
+    
+    def _apply_data(self, points, pre_close):
+        """用分时数据更新价格信息和图表"""
         if not points:
             self.status_label.setText("暂无分时数据")
             return
         
-        # 更新价格信息
-        last_point = points[-1]
+        self._update_header(points[-1])
+        self._update_indicators()
+        
+        if HAS_PYQTGRAPH:
+            self._draw_chart(points, pre_close)
+        
+        self.status_label.setText(f"共 {len(points)} 个数据点")
+    
+    def _update_header(self, last_point):
+        """更新价格信息"""
         current_price = last_point["price"]
         change = last_point["change"]
         change_pct = last_point["change_pct"]
@@ -137,197 +251,312 @@ class ChartDialog(QDialog):
         sign = "+" if change >= 0 else ""
         self.change_label.setText(f"{sign}{change:.2f} ({sign}{change_pct:.2f}%)")
         self.change_label.setStyleSheet(f"color: {color};")
+    
+    def _update_indicators(self):
+        """显示控制器中该股票的最新流式指标"""
+        self.indicator_label.setText(describe(self.controller.indicators.get(self.stock_code)))
+    
+    # --- Live mode ---
+    
+    def _set_live(self, live):
+        """实时模式：订阅控制器的逐股行情，新分钟增量追加到曲线"""
+        live = live and self.live_check.isChecked() and self.isVisible()
+        if live == self._live_connected:
+            return
+        self._live_connected = live
+        if live:
+            self.controller.quote_updated.connect(self._on_quote_updated)
+        else:
+            self.controller.quote_updated.disconnect(self._on_quote_updated)
+    
+    def _on_quote_updated(self, code, info):
+        if code != self.stock_code:
+            return
+        points = info.get("points") or []
+        if not points:
+            return
+        pre_close = info.get("preClose", 0)
         
-        if HAS_PYQTGRAPH:
-            self._draw_chart(points, pre_close)
+        self._update_header(points[-1])
+        self._update_indicators()
+        self.status_label.setText(f"共 {len(points)} 个数据点 · 实时")
+        if not HAS_PYQTGRAPH:
+            return
         
-        self.status_label.setText(f"共 {len(points)} 个数据点")
+        self.placeholder.setVisible(False)
+        if self.curves.update(points, pre_close):
+            self._update_candles()
+            self._update_history()
+            self._update_profile()
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._set_live(True)
+    
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self._set_live(False)
+    
+    def _create_plot_items(self):
+        """创建一次性的绘图项，之后每次刷新只调用 setData"""
+        market = get_market_type(self.stock_code)
+        self.curves = IntradayCurves(self.plot_widget.getPlotItem(), self.theme, self.stock_code)
+        self.candles = CandlestickItem(self.theme)
+        self.candles.setVisible(False)
+        self.plot_widget.addItem(self.candles)
+        
+        # 多日分时：一条曲线 + 日分隔线，首次切换时才读取历史
+        self.history_curve = self.plot_widget.plot(pen=pg.mkPen(color=self.theme['TEXT_COLOR'], width=1.2))
+        self.history_curve.setVisible(False)
+        separator_pen = pg.mkPen(color=self.theme['BORDER_COLOR'], style=Qt.DashLine, width=1)
+        self.day_lines = []
+        for _ in range(HISTORY_DAYS - 1):
+            line = pg.InfiniteLine(angle=90, movable=False, pen=separator_pen)
+            line.setVisible(False)
+            self.plot_widget.addItem(line, ignoreBounds=True)
+            self.day_lines.append(line)
+        
+        # 数据到达前的占位提示
+        self.placeholder = pg.TextItem("加载中...", color=self.theme['TEXT_SECONDARY'], anchor=(0.5, 0.5))
+        self.placeholder.setPos(len(get_time_slots(market)) / 2, 0.5)
+        self.plot_widget.addItem(self.placeholder)
+        
+        self.profile_bars = pg.BarGraphItem(x0=[], y=[], width=[], height=0,
+                                            brush=pg.mkBrush(self.theme['TEXT_SECONDARY']), pen=pg.mkPen(None))
+        self.profile_bars.setOpacity(0.6)
+        self.profile_widget.addItem(self.profile_bars)
+        self.poc_line = pg.InfiniteLine(angle=0, movable=False, pen=pg.mkPen(color='#ffc107', width=1))
+        self.poc_line.setVisible(False)
+        self.profile_widget.addItem(self.poc_line)
+        
+        self._create_crosshair()
     
     def _draw_chart(self, points, pre_close):
         """绘制分时图，根据市场交易时间对齐坐标轴"""
-        self.plot_widget.clear()
-        
-        if not points:
+        self.placeholder.setVisible(False)
+        self.curves.redraw(points, pre_close)
+        self._update_candles()
+        self._update_history()
+        self._update_profile()
+    
+    # --- Timeframe ---
+    
+    def _on_timeframe_changed(self, index):
+        was_history = self._timeframe < 0
+        self._timeframe = self.timeframe_combo.itemData(index)
+        show_history = self._timeframe < 0
+        self.curves.set_lines_visible(self._timeframe == 0)
+        self.candles.setVisible(self._timeframe > 0)
+        self.history_curve.setVisible(show_history)
+        if show_history:
+            self._update_history()
+        elif was_history:
+            self._restore_intraday_axis()
+        self._update_candles()
+    
+    def _update_candles(self):
+        """K 线只在选中对应周期时才聚合，分时序列的增量由 BarAggregator 内部跟踪"""
+        if self._timeframe <= 0 or self.curves.series is None:
+            return
+        self.candles.setData(self.bars.get(self.curves.series, self._timeframe))
+    
+    # --- Multi-day history ---
+    
+    def _update_history(self):
+        """
+        多日分时：本地历史中最近几天 + 当天，按天首尾相接画在一条时间轴上
+        过去几天只在切换到多日视图（或交易日变化）时读取并拼接一次，
+        之后每个行情 tick 只改写缓冲区末尾当天的一段
+        """
+        if self._timeframe >= 0:
+            return
+        # 各天昨收不同，不显示昨收基准线
+        self.curves.base_line.setVisible(False)
+        today = self.curves.series
+        before = None
+        if today is not None and today.first_timestamp:
+            before = trading_day(today.first_timestamp)
+        cache = self._history_cache
+        if cache is None or cache["before"] != before:
+            cache = self._load_history(before)
+        
+        past = cache["days"]
+        history = list(past)
+        if today is not None and not today.is_empty:
+            history.append((before or "", today))
+        self._history_days = history
+        if len(history) != cache["shown"]:
+            cache["shown"] = len(history)
+            self._set_history_axis(history, cache["width"])
+        if not history:
+            self.history_curve.setData([], [])
             return
         
-        # 1. 确定市场类型和交易时间段
-        # 默认 A股: 9:30-11:30, 13:00-15:00 (共241分钟, 含9:30和15:00, 通常API给的点数是241或240)
-        # 港股: 9:30-12:00, 13:00-16:00 (共330分钟)
-        market_type = "A"
-        if self.stock_code.startswith("0") and len(self.stock_code) == 5:
-            market_type = "HK"
-        
-        # 生成标准时间轴
-        time_slots = []
-        if market_type == "HK":
-            # Morning: 9:30 - 12:00
-            # 9:30 - 9:59
-            for m in range(30, 60): time_slots.append(f"09:{m:02d}")
-            # 10:00 - 11:59
-            for h in range(10, 12):
-                for m in range(60): time_slots.append(f"{h:02d}:{m:02d}")
-            time_slots.append("12:00")
-            
-            # Afternoon: 13:00 - 16:00
-            # 13:00 - 15:59
-            for h in range(13, 16):
-                for m in range(60): time_slots.append(f"{h:02d}:{m:02d}")
-            time_slots.append("16:00")
-            
-        else: # A-Share
-            # Morning: 9:30 - 11:30
-            # 9:30 - 9:59
-            for m in range(30, 60): time_slots.append(f"09:{m:02d}")
-            # 10:00 - 10:59
-            for m in range(60): time_slots.append(f"10:{m:02d}")
-            # 11:00 - 11:29
-            for m in range(30): time_slots.append(f"11:{m:02d}")
-            time_slots.append("11:30")
-            
-            # Afternoon: 13:00 - 15:00
-            # 13:00 - 14:59
-            for h in range(13, 15):
-                for m in range(60): time_slots.append(f"{h:02d}:{m:02d}")
-            time_slots.append("15:00")
-            
-        # 2. 映射数据点到时间轴
-        total_minutes = len(time_slots)
-        
-        # ... (Data mapping logic remains conceptually same but ensure we use updated time_slots)
-        
-        price_map = {} 
-        avg_price_map = {}
-        for p in points:
-            price_map[p['time']] = p['price']
-            avg_price_map[p['time']] = p.get('avg_price', 0)
-            
-        last_time = points[-1]['time']
-        
-        # Robust Index Finding
-        current_idx = 0
-        if last_time in time_slots:
-            current_idx = time_slots.index(last_time)
+        # 当天的一段写在过去几天之后，connect 在最后一点断开
+        end = cache["past_len"]
+        low, high = cache["low"], cache["high"]
+        if len(history) > len(past):
+            prices = today.valid("price")
+            start, end = end, end + len(prices)
+            cache["x"][start:end] = today.x + len(past) * cache["width"]
+            cache["y"][start:end] = prices
+            cache["connect"][start:end] = 1
+            low, high = np.nanmin([low, np.nanmin(prices)]), np.nanmax([high, np.nanmax(prices)])
+        cache["connect"][end - 1] = 0
+        self.history_curve.setData(cache["x"][:end], cache["y"][:end], connect=cache["connect"][:end])
+        
+        low, high = float(low), float(high)
+        margin = (high - low) * 0.1 or low * 0.01
+        self.plot_widget.setYRange(low - margin, high + margin, padding=0)
+    
+    def _load_history(self, before):
+        """读取 before 之前的几个交易日，拼接成预留了当天空间的缓冲区"""
+        market = get_market_type(self.stock_code)
+        width = len(get_time_slots(market))
+        past = self.controller.history.recent(self.stock_code, abs(self._timeframe) - 1, before=before)
+        
+        # 每天的 X 坐标平移 i * 槽位数；connect 在天与天之间断开
+        xs = [series.x + i * width for i, (_, series) in enumerate(past)]
+        ys = [series.valid("price") for _, series in past]
+        past_len = sum(len(x) for x in xs)
+        x = np.empty(past_len + width)
+        y = np.empty(past_len + width)
+        connect = np.ones(past_len + width, dtype=np.uint8)
+        if past:
+            x[:past_len] = np.concatenate(xs)
+            y[:past_len] = np.concatenate(ys)
+            connect[np.cumsum([len(v) for v in xs]) - 1] = 0
+        prices = y[:past_len]
+        self._history_cache = {
+            "before": before,
+            "days": past,
+            "width": width,
+            "past_len": past_len,
+            "x": x,
+            "y": y,
+            "connect": connect,
+            "low": np.nanmin(prices) if past_len else np.nan,
+            "high": np.nanmax(prices) if past_len else np.nan,
+            "shown": -1,  # 已设置坐标轴的天数
+        }
+        return self._history_cache
+    
+    def _set_history_axis(self, history, width):
+        """按天数设置日分隔线、刻度和 X 轴范围，天数变化时才调用"""
+        for i, line in enumerate(self.day_lines):
+            line.setVisible(0 < i + 1 < len(history))
+            line.setPos((i + 1) * width)
+        ticks = [(i * width, f"{day[4:6]}-{day[6:]}" if day else "今日") for i, (day, _) in enumerate(history)]
+        self.plot_widget.getAxis('bottom').setTicks([ticks])
+        self.plot_widget.setXRange(0, max(len(history), 1) * width, padding=0)
+    
+    def _restore_intraday_axis(self):
+        """从多日视图切回当天时恢复时间轴和 Y 轴范围，下次切换时重新读取历史"""
+        market = get_market_type(self.stock_code)
+        self._history_days = []
+        self._history_cache = None
+        for line in self.day_lines:
+            line.setVisible(False)
+        self.plot_widget.getAxis('bottom').setTicks([get_axis_ticks(market)])
+        self.plot_widget.setXRange(0, len(get_time_slots(market)))
+        series = self.curves.series
+        if series is not None and series.pre_close > 0:
+            self.curves.base_line.setVisible(True)
+        if self.curves.y_range is not None:
+            self.plot_widget.setYRange(*self.curves.y_range, padding=0)
+    
+    # --- Volume profile ---
+    
+    def _on_profile_toggled(self, checked):
+        self.profile_widget.setVisible(checked)
+        self._update_profile()
+    
+    def _update_profile(self):
+        """分价成交量随分时序列增量累加，隐藏时不计算"""
+        if not self.profile_check.isChecked() or self.curves.series is None:
+            return
+        if not self.profile.update(self.curves.series):
+            return
+        prices, volumes = self.profile.histogram()
+        self.profile_bars.setOpts(x0=np.zeros(len(prices)), y=prices, width=volumes,
+                                  height=self.profile.step * 0.8)
+        poc = self.profile.point_of_control()
+        self.poc_line.setVisible(poc is not None)
+        if poc is not None:
+            self.poc_line.setPos(poc)
+    
+    # --- Crosshair ---
+    
+    def _create_crosshair(self):
+        """十字光标：鼠标移动经 SignalProxy 限频到 60Hz，悬停数据直接按槽位下标读取"""
+        pen = pg.mkPen(color=self.theme['TEXT_SECONDARY'], style=Qt.DashLine, width=1)
+        self.crosshair_v = pg.InfiniteLine(angle=90, movable=False, pen=pen)
+        self.crosshair_h = pg.InfiniteLine(angle=0, movable=False, pen=pen)
+        self.plot_widget.addItem(self.crosshair_v, ignoreBounds=True)
+        self.plot_widget.addItem(self.crosshair_h, ignoreBounds=True)
+        
+        # 读数固定在绘图区左上角，不随坐标轴缩放
+        self.hover_text = pg.TextItem(color=self.theme['TEXT_COLOR'], anchor=(0, 0),
+                                      fill=pg.mkBrush(self.theme['APP_BG']))
+        self.hover_text.setParentItem(self.plot_widget.getPlotItem().getViewBox())
+        self.hover_text.setPos(4, 4)
+        self._set_crosshair_visible(False)
+        
+        self._slots = get_time_slots(get_market_type(self.stock_code))
+        self._mouse_proxy = pg.SignalProxy(self.plot_widget.scene().sigMouseMoved,
+                                           rateLimit=60, slot=self._on_mouse_moved)
+        self.plot_widget.installEventFilter(self)
+    
+    def _set_crosshair_visible(self, visible):
+        for item in (self.crosshair_v, self.crosshair_h, self.hover_text):
+            item.setVisible(visible)
+    
+    def eventFilter(self, obj, event):
+        if obj is self.plot_widget and event.type() == QEvent.Leave:
+            self._set_crosshair_visible(False)
+        return super().eventFilter(obj, event)
+    
+    def _on_mouse_moved(self, args):
+        pos = args[0]
+        view_box = self.plot_widget.getPlotItem().getViewBox()
+        if self._timeframe < 0:
+            series = self._history_days[-1][1] if self._history_days else None
         else:
-            # Try to find closest time slot (e.g. "15:01" -> "15:00")
-            # Or just use total length if it's already closed?
-            # Basic fallback: match by string comparison or just linear fill?
-            # Since this is a chart, correct positioning is key.
-            # Let's try to match HH:MM
-            try:
-                # If exact match fails, check if time > last slot (market closed) -> use last slot
-                if last_time > time_slots[-1]:
-                    current_idx = len(time_slots) - 1
-                elif last_time < time_slots[0]:
-                    current_idx = 0
-                else:
-                    # Search for insertion point?
-                    # Simple fallback: linear last index
-                    current_idx = len(points) - 1
-            except:
-                 current_idx = len(points) - 1
-            
-        final_x = []
-        final_prices = []
-        final_avgs = []
-        
-        last_valid_price = pre_close
-        last_valid_avg = pre_close
-        
-        for i in range(current_idx + 1):
-            t_str = time_slots[i]
-            if t_str in price_map:
-                p = price_map[t_str]
-                a = avg_price_map[t_str]
-                final_x.append(i)
-                final_prices.append(p)
-                final_avgs.append(a)
-                last_valid_price = p
-                last_valid_avg = a
-            else:
-                # Fill gaps
-                if final_prices:
-                    final_x.append(i)
-                    final_prices.append(last_valid_price)
-                    final_avgs.append(last_valid_avg)
-
-        # 绘制曲线
-        # 昨收基准线
-        line_base = pg.InfiniteLine(angle=0, movable=False, pos=pre_close, 
-                                  pen=pg.mkPen(color=self.theme['COLOR_FLAT'], style=Qt.DashLine, width=1))
-        self.plot_widget.addItem(line_base)
-        
-        # 均价线 (黄色/橙色)
-        self.plot_widget.plot(final_x, final_avgs, 
-                            pen=pg.mkPen(color='#ffc107', width=1.5), name="均价")
-        
-        # 价格线 (分段绘制以实现涨红跌绿)
-        # 这种方式对于点数较少(分时图约240点)是性能可接受的
-        for i in range(len(final_x) - 1):
-            x_seg = [final_x[i], final_x[i+1]]
-            y_seg = [final_prices[i], final_prices[i+1]]
-            
-            # 颜色逻辑：根据最新点于昨收的关系
-            # 如果 y > pre_close 用红，否则用绿
-            # 或者更细致：如果整段都在上方红，都在下方绿，跨越则拆分？
-            # 简单策略：由终点决定颜色 (最常见做法)
-            is_up = final_prices[i+1] >= pre_close
-            seg_color = self.theme['COLOR_UP'] if is_up else self.theme['COLOR_DOWN']
-            
-            self.plot_widget.plot(x_seg, y_seg, pen=pg.mkPen(color=seg_color, width=2))
-
-        # 添加一个淡色的填充 (可选)
-        # self.plot_widget.plot(final_x, final_prices, pen=None, fillLevel=pre_close, brush=(100, 100, 100, 20))
-        
-
-        
-        # Connect the segments
-        # This draws line segments colored by value vs pre_close
-        for i in range(len(final_x) - 1):
-            x1, x2 = final_x[i], final_x[i+1]
-            y1, y2 = final_prices[i], final_prices[i+1]
-            
-            # Determine color logic
-            # Use y2 comparison? Or max(y1, y2)?
-            # Standard: if current point >= pre_close -> Red
-            is_up = y2 >= pre_close
-            seg_color = self.theme['COLOR_UP'] if is_up else self.theme['COLOR_DOWN']
-            
-            self.plot_widget.plot([x1, x2], [y1, y2], pen=pg.mkPen(color=seg_color, width=2))
-
-        # Add fill for entire curve (optional, generic faint color)
-        # fill_curve = self.plot_widget.plot(final_x, final_prices, pen=None, fillLevel=pre_close, brush=(50, 50, 50, 30))
-        
-
-        # 设置 X 轴标签
-        # A股: 9:30, 10:30, 11:30/13:00 (Center), 14:00, 15:00
-        ticks = []
+            series = self.curves.series
+        if series is None or series.is_empty or not view_box.sceneBoundingRect().contains(pos):
+            self._set_crosshair_visible(False)
+            return
         
-        if market_type == "HK":
-            key_times = ["09:30", "10:30", "11:30", "13:00", "14:00", "15:00"]
+        # X 坐标就是槽位下标，直接取整即可，超出有效区间时吸附到两端
+        slot = int(round(view_box.mapSceneToView(pos).x()))
+        day, offset = "", 0
+        if self._timeframe < 0:
+            # 多日视图：先按槽位数整除得到第几天
+            width = len(self._slots)
+            day_index = min(max(slot // width, 0), len(self._history_days) - 1)
+            day, series = self._history_days[day_index]
+            offset = day_index * width
+            slot -= offset
+        slot = min(max(slot, series.first), series.last)
+        price = float(series.price[slot])
+        
+        if self._timeframe > 0:
+            bars = self.bars.get(series, self._timeframe)
+            bar = int(get_bar_layout(series.market, self._timeframe)[1][slot])
+            start, end = int(bars.starts[bar]), min(int(bars.ends[bar]), series.last)
+            self.crosshair_v.setPos((start + int(bars.ends[bar])) / 2)
+            self.crosshair_h.setPos(bars.close[bar])
+            text = (f"{self._slots[start]}-{self._slots[end]}\n"
+                    f"开 {bars.open[bar]:.2f}  高 {bars.high[bar]:.2f}\n"
+                    f"低 {bars.low[bar]:.2f}  收 {bars.close[bar]:.2f}\n"
+                    f"量 {bars.volume[bar]:.0f}")
         else:
-            # 11:30 & 13:00 are adjacent. Showing both overlaps.
-            # We can show "11:30/13:00" at the midpoint?
-            # Or just show 11:30.
-            key_times = ["09:30", "10:30", "11:30", "14:00", "15:00"]
-            
-        for kt in key_times:
-            if kt in time_slots:
-                idx = time_slots.index(kt)
-                ticks.append((idx, kt))
-        
-        # Add a special separator tick or combined label if needed?
-        # For now, distinct labels are fine if selected carefully to not overlap.
-        
-        self.plot_widget.getAxis('bottom').setTicks([ticks])
-        self.plot_widget.setXRange(0, total_minutes) # 固定 X 轴范围
-        
-        # 自动调整 Y 轴范围
-        valid_values = final_prices + ([pre_close] if pre_close > 0 else [])
-        if valid_values:
-            min_price = min(valid_values)
-            max_price = max(valid_values)
-            if min_price == max_price:
-                margin = min_price * 0.01
-            else:
-                margin = (max_price - min_price) * 0.1
-            self.plot_widget.setYRange(min_price - margin, max_price + margin)
+            self.crosshair_v.setPos(slot + offset)
+            self.crosshair_h.setPos(price)
+            sign = "+" if series.change[slot] >= 0 else ""
+            date = f"{day[4:6]}-{day[6:]} " if day else ""
+            text = (f"{date}{self._slots[slot]}  价 {price:.2f}\n"
+                    f"均 {series.avg_price[slot]:.2f}  量 {series.volume[slot]:.0f}\n"
+                    f"{sign}{series.change[slot]:.2f} ({sign}{series.change_pct[slot]:.2f}%)")
+        self.hover_text.setText(text)
+        self._set_crosshair_visible(True)
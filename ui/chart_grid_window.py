@@ -0,0 +1,177 @@
+"""
+多图网格：在一个 GraphicsLayoutWidget 中同时显示多只股票的分时图
+"""
+import math
+
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QScrollArea, QPushButton
+from PySide6.QtCore import Qt
+
+import pyqtgraph as pg
+
+from core.trading_session import get_market_type
+from ui.intraday_plot import IntradayCurves
+
+
+class _GridCell:
+    """网格中的一个分时图"""
+
+    __slots__ = ("code", "row", "plot", "curves", "pending", "title")
+
+    def __init__(self, code, row, plot, curves):
+        self.code = code
+        self.row = row
+        self.plot = plot
+        self.curves = curves
+        self.pending = None  # 尚未绘制的最新行情（不在可视区域时暂存）
+        self.title = code
+
+
+class ChartGridWindow(QWidget):
+    """
+    多图网格窗口
+    - 同一市场的图共用一个时间轴模型（X 轴互相联动，刻度来自 trading_session 缓存）
+    - 每轮行情只做一次更新遍历，数据先暂存到格子上
+    - 只绘制可视区域内的格子，滚动到视野内时再补绘
+    """
+
+    COLUMNS = 4
+    CELL_HEIGHT = 180
+
+    def __init__(self, controller, parent=None):
+        super().__init__(parent)
+        self.setWindowFlag(Qt.Window)
+        self.controller = controller
+        self.theme = self.controller.theme_manager.get_current_theme()
+
+        self.setWindowTitle("多图监控")
+        self.resize(1200, 760)
+        self.setStyleSheet(self.controller.theme_manager.get_style())
+
+        self._cells = {}  # code -> _GridCell
+        self._watchlist = None  # 上次重建网格时的自选股快照
+        self._is_active = False
+
+        self._setup_ui()
+
+    def _setup_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(10, 10, 10, 10)
+
+        header = QHBoxLayout()
+        self.info_label = QLabel("")
+        self.info_label.setProperty("class", "text-secondary")
+        header.addWidget(self.info_label)
+        header.addStretch()
+        btn_rebuild = QPushButton("🔄 同步自选")
+        btn_rebuild.clicked.connect(self._rebuild)
+        header.addWidget(btn_rebuild)
+        layout.addLayout(header)
+
+        pg.setConfigOptions(antialias=True)
+        self.graphics = pg.GraphicsLayoutWidget()
+        self.graphics.setBackground(self.theme['APP_BG'])
+
+        self.scroll = QScrollArea()
+        self.scroll.setWidgetResizable(True)
+        self.scroll.setWidget(self.graphics)
+        self.scroll.verticalScrollBar().valueChanged.connect(self._render_visible)
+        layout.addWidget(self.scroll)
+
+    def _rebuild(self):
+        """按当前自选列表重建网格"""
+        self._watchlist = self.controller.get_watchlist()
+        codes = self._watchlist.codes
+        self.graphics.clear()
+        self._cells = {}
+
+        axis_pen = pg.mkPen(color=self.theme['BORDER_COLOR'])
+        text_pen = pg.mkPen(color=self.theme['TEXT_COLOR'])
+        x_models = {}  # market -> 该市场第一个图，其余图的 X 轴与它联动
+
+        for i, code in enumerate(codes):
+            row, col = divmod(i, self.COLUMNS)
+            plot = self.graphics.addPlot(row=row, col=col)
+            plot.setMenuEnabled(False)
+            plot.setMouseEnabled(x=False, y=False)
+            plot.hideButtons()
+            plot.showGrid(x=True, y=True, alpha=0.2)
+            for axis in ('left', 'bottom'):
+                plot.getAxis(axis).setPen(axis_pen)
+                plot.getAxis(axis).setTextPen(text_pen)
+            plot.setTitle(code, color=self.theme['TEXT_COLOR'], size="9pt")
+
+            curves = IntradayCurves(plot, self.theme, code, avg_width=1, price_width=1.2)
+            market = get_market_type(code)
+            if market in x_models:
+                plot.setXLink(x_models[market])
+            else:
+                x_models[market] = plot
+
+            self._cells[code] = _GridCell(code, row, plot, curves)
+
+        rows = max(1, math.ceil(len(codes) / self.COLUMNS))
+        self.graphics.setFixedHeight(rows * self.CELL_HEIGHT)
+        self.info_label.setText(f"共 {len(codes)} 只股票")
+
+        # 用最新快照填充
+        if self.controller.latest_data:
+            self._on_data(self.controller.latest_data)
+
+    def _on_data(self, data):
+        """单次遍历：把本批行情挂到对应格子上，然后只绘制可视区域"""
+        for code, info in data.items():
+            cell = self._cells.get(code)
+            if cell is not None:
+                cell.pending = info
+        self._render_visible()
+
+    def _visible_rows(self):
+        top = self.scroll.verticalScrollBar().value()
+        bottom = top + self.scroll.viewport().height()
+        first = top // self.CELL_HEIGHT
+        last = bottom // self.CELL_HEIGHT
+        return first, last
+
+    def _render_visible(self, *args):
+        first, last = self._visible_rows()
+        for cell in self._cells.values():
+            if cell.pending is None or not (first <= cell.row <= last):
+                continue
+            info = cell.pending
+            cell.pending = None
+
+            title = f"{info.get('name', cell.code)} {info.get('price', '--')} {info.get('ratio', '--')}"
+            if title != cell.title:
+                cell.title = title
+                cell.plot.setTitle(title, color=self.theme['TEXT_COLOR'], size="9pt")
+
+            points = info.get("points") or []
+            if points:
+                cell.curves.update(points, info.get("preClose", 0))
+
+    def _set_active(self, active):
+        """与主窗口一致：可见时才订阅行情"""
+        if active == self._is_active:
+            return
+        self._is_active = active
+        self.controller.set_view_active("grid", active)
+        if active:
+            self.controller.stock_data_updated.connect(self._on_data)
+            if self._watchlist is None or self.controller.get_watchlist().version != self._watchlist.version:
+                self._rebuild()
+            elif self.controller.latest_data:
+                self._on_data(self.controller.latest_data)
+        else:
+            self.controller.stock_data_updated.disconnect(self._on_data)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._set_active(True)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self._set_active(False)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._render_visible()
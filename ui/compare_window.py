@@ -0,0 +1,171 @@
+"""
+叠加对比窗口：多只股票的分时涨跌幅画在同一张图上，比较日内相对强弱
+"""
+from PySide6.QtWidgets import QWidget, QHBoxLayout, QVBoxLayout, QLabel, QListWidget, QListWidgetItem
+from PySide6.QtCore import Qt
+
+import pyqtgraph as pg
+
+from core.comparison import NormalizedOverlay
+from core.trading_session import get_axis_ticks, get_time_slots
+
+# 叠加曲线的配色（循环使用）
+PALETTE = (
+    "#FF6B6B", "#4ECDC4", "#ffc107", "#3b82f6", "#a855f7",
+    "#f97316", "#22c55e", "#ec4899", "#14b8a6", "#eab308",
+)
+
+
+class CompareWindow(QWidget):
+    """
+    叠加对比窗口
+    左侧勾选自选股，右侧画出各自相对昨收的涨跌幅。
+    归一化结果由 NormalizedOverlay 按行增量维护，每轮行情只对有变化的曲线 setData。
+    """
+
+    def __init__(self, controller, parent=None):
+        super().__init__(parent)
+        self.setWindowFlag(Qt.Window)
+        self.controller = controller
+        self.theme = self.controller.theme_manager.get_current_theme()
+
+        self.setWindowTitle("叠加对比")
+        self.resize(1000, 560)
+        self.setStyleSheet(self.controller.theme_manager.get_style())
+
+        self.overlay = NormalizedOverlay()
+        self._curves = {}  # code -> PlotDataItem
+        self._items = {}  # code -> QListWidgetItem
+        self._watchlist = None  # 上次重建列表时的自选股快照
+        self._is_active = False
+
+        self._setup_ui()
+
+    def _setup_ui(self):
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(10, 10, 10, 10)
+
+        side = QVBoxLayout()
+        hint = QLabel("勾选要对比的股票")
+        hint.setProperty("class", "text-secondary")
+        side.addWidget(hint)
+        self.code_list = QListWidget()
+        self.code_list.setFixedWidth(200)
+        self.code_list.itemChanged.connect(self._on_item_changed)
+        side.addWidget(self.code_list)
+        layout.addLayout(side)
+
+        pg.setConfigOptions(antialias=True)
+        self.plot_widget = pg.PlotWidget()
+        self.plot_widget.setBackground(self.theme['APP_BG'])
+        self.plot_widget.showGrid(x=True, y=True, alpha=0.3)
+        self.plot_widget.setMenuEnabled(False)
+        self.plot_widget.setMouseEnabled(x=False, y=False)
+        axis_pen = pg.mkPen(color=self.theme['BORDER_COLOR'])
+        text_pen = pg.mkPen(color=self.theme['TEXT_COLOR'])
+        for axis in ('left', 'bottom'):
+            self.plot_widget.getAxis(axis).setPen(axis_pen)
+            self.plot_widget.getAxis(axis).setTextPen(text_pen)
+        self.plot_widget.setLabel('left', "涨跌幅 %")
+        self.plot_widget.addLegend(offset=(10, 10))
+
+        zero_line = pg.InfiniteLine(angle=0, movable=False,
+                                    pen=pg.mkPen(color=self.theme['COLOR_FLAT'], style=Qt.DashLine, width=1))
+        self.plot_widget.addItem(zero_line)
+        layout.addWidget(self.plot_widget, 1)
+
+    def _rebuild_list(self):
+        """按当前自选列表重建左侧列表，保留已勾选的股票"""
+        self._watchlist = self.controller.get_watchlist()
+        codes = self._watchlist.codes
+        for code in list(self.overlay.codes):
+            if code not in codes:
+                self._remove_code(code)
+
+        self.code_list.blockSignals(True)
+        self.code_list.clear()
+        self._items = {}
+        for code in codes:
+            item = QListWidgetItem(self._item_text(code))
+            item.setData(Qt.UserRole, code)
+            item.setToolTip(code)
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked if code in self.overlay else Qt.Unchecked)
+            self.code_list.addItem(item)
+            self._items[code] = item
+        self.code_list.blockSignals(False)
+
+    def _item_text(self, code):
+        info = self.controller.latest_data.get(code) or {}
+        return f"{info.get('name', code)}  {info.get('ratio', '')}"
+
+    def _on_item_changed(self, item):
+        code = item.data(Qt.UserRole)
+        if item.checkState() == Qt.Checked:
+            self._add_code(code)
+        else:
+            self._remove_code(code)
+
+    def _add_code(self, code):
+        if code in self.overlay:
+            return
+        info = self.controller.latest_data.get(code) or {}
+        first = len(self.overlay) == 0
+        self.overlay.add(code, info.get("points") or [], info.get("preClose", 0))
+        if first:
+            # 时间轴以第一只股票的市场为准
+            self.plot_widget.getAxis('bottom').setTicks([get_axis_ticks(self.overlay.market)])
+            self.plot_widget.setXRange(0, len(get_time_slots(self.overlay.market)))
+
+        # 颜色按自选列表中的位置分配，勾选顺序变化时颜色不变
+        index = self._watchlist.index(code)
+        if index is None:
+            index = len(self._curves)
+        color = PALETTE[index % len(PALETTE)]
+        curve = self.plot_widget.plot(pen=pg.mkPen(color=color, width=1.5), name=info.get("name", code))
+        self._curves[code] = curve
+        curve.setData(*self.overlay.row(code))
+
+    def _remove_code(self, code):
+        self.overlay.remove(code)
+        curve = self._curves.pop(code, None)
+        if curve is not None:
+            self.plot_widget.removeItem(curve)
+        if len(self.overlay) == 0:
+            self.overlay = NormalizedOverlay()
+
+    def _on_data(self, data):
+        self.code_list.blockSignals(True)
+        for code, item in self._items.items():
+            if code in data:
+                item.setText(self._item_text(code))
+        self.code_list.blockSignals(False)
+
+        for code, info in data.items():
+            if code not in self.overlay:
+                continue
+            if self.overlay.update(code, info.get("points") or [], info.get("preClose", 0)):
+                self._curves[code].setData(*self.overlay.row(code))
+
+    def _set_active(self, active):
+        """与其他窗口一致：可见时才订阅行情"""
+        if active == self._is_active:
+            return
+        self._is_active = active
+        self.controller.set_view_active("compare", active)
+        if active:
+            self.controller.stock_data_updated.connect(self._on_data)
+            if self._watchlist is None or self.controller.get_watchlist().version != self._watchlist.version:
+                self._rebuild_list()
+            if self.controller.latest_data:
+                self._on_data(self.controller.latest_data)
+        else:
+            self.controller.stock_data_updated.disconnect(self._on_data)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._set_active(True)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self._set_active(False)
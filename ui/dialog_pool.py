@@ -0,0 +1,99 @@
+"""
+按股票代码复用的对话框池
+"""
+import time
+from collections import OrderedDict
+
+from PySide6.QtCore import QObject, QTimer, QEvent
+
+
+class DialogPool(QObject):
+    """
+    对话框缓存：同一只股票重复打开时复用已有实例。
+    - 超过 capacity 时回收最久未使用且已隐藏的对话框
+    - 隐藏超过 idle_timeout 秒的对话框定期回收，释放其 pyqtgraph 场景
+    回收时调用 deleteLater，确保图表和样式表不会在一天内不断累积。
+    """
+
+    SWEEP_INTERVAL = 60
+
+    def __init__(self, factory, capacity=5, idle_timeout=300, parent=None):
+        super().__init__(parent)
+        self._factory = factory
+        self._capacity = capacity
+        self._idle_timeout = idle_timeout
+        self._dialogs = OrderedDict()  # key -> dialog
+        self._hidden_since = {}  # key -> time.monotonic()
+
+        self._sweep_timer = QTimer(self)
+        self._sweep_timer.timeout.connect(self._sweep)
+
+    def __len__(self):
+        return len(self._dialogs)
+
+    def get(self, key, *args):
+        """
+        获取 key 对应的对话框，不存在时用 factory(key, *args) 创建
+        返回: (dialog, 是否为复用的实例)
+        """
+        dialog = self._dialogs.get(key)
+        if dialog is not None:
+            self._dialogs.move_to_end(key)
+            self._hidden_since.pop(key, None)
+            return dialog, True
+
+        dialog = self._factory(key, *args)
+        dialog.setProperty("pool_key", key)
+        dialog.installEventFilter(self)
+        self._dialogs[key] = dialog
+        # 新实例尚未显示，不能作为回收对象
+        self._trim(keep=key)
+        if not self._sweep_timer.isActive():
+            self._sweep_timer.start(self.SWEEP_INTERVAL * 1000)
+        return dialog, False
+
+    def eventFilter(self, obj, event):
+        if event.type() in (QEvent.Hide, QEvent.Show):
+            key = obj.property("pool_key")
+            if key in self._dialogs:
+                if event.type() == QEvent.Hide:
+                    self._hidden_since[key] = time.monotonic()
+                else:
+                    self._hidden_since.pop(key, None)
+        return super().eventFilter(obj, event)
+
+    def _trim(self, keep=None):
+        """
+        超出容量时按 LRU 顺序回收已隐藏的对话框，正在显示的和 keep 不回收
+        全部都在显示时允许暂时超出容量
+        """
+        overflow = len(self._dialogs) - self._capacity
+        if overflow <= 0:
+            return
+        candidates = [k for k, d in self._dialogs.items() if k != keep and not d.isVisible()]
+        for key in candidates[:overflow]:
+            self._evict(key)
+
+    def _sweep(self):
+        now = time.monotonic()
+        for key, since in list(self._hidden_since.items()):
+            if now - since >= self._idle_timeout:
+                self._evict(key)
+        if not self._dialogs:
+            self._sweep_timer.stop()
+
+    def _evict(self, key):
+        dialog = self._dialogs.pop(key, None)
+        self._hidden_since.pop(key, None)
+        if dialog is not None:
+            dialog.removeEventFilter(self)
+            dialog.close()
+            dialog.deleteLater()
+
+    def remove(self, key):
+        """股票被删除时释放其对话框"""
+        self._evict(key)
+
+    def clear(self):
+        for key in list(self._dialogs):
+            self._evict(key)
@@ -0,0 +1,196 @@
+"""
+分时曲线绘图项（分时图对话框、多图网格共用）
+"""
+from PySide6.QtCore import Qt, QRectF, QPointF
+from PySide6.QtGui import QPicture, QPainter
+
+import numpy as np
+import pyqtgraph as pg
+
+from core.trading_session import get_market_type, get_time_slots, get_axis_ticks, align_points
+
+
+class IntradayCurves:
+    """
+    在一个 PlotItem 上维护分时图的全部绘图项：昨收基准线、均价线、涨/跌两条价格线。
+    绘图项只创建一次，刷新时调用 setData；价格线通过 connect 数组决定每一段由哪条曲线绘制。
+    update() 在同一交易日内增量合并新分钟，只重算变化区间的颜色，
+    新价格仍在当前 Y 范围内时不调整坐标轴。
+    """
+
+    def __init__(self, plot_item, theme, code, show_avg=True, avg_width=1.5, price_width=2):
+        self.plot_item = plot_item
+        self.code = code
+        self.market = get_market_type(code)
+        self.series = None
+        self.y_range = None
+        self._seg_up = None
+        self._seg_down = None
+
+        # 昨收基准线
+        self.base_line = pg.InfiniteLine(angle=0, movable=False,
+                                         pen=pg.mkPen(color=theme['COLOR_FLAT'], style=Qt.DashLine, width=1))
+        self.base_line.setVisible(False)
+        plot_item.addItem(self.base_line)
+
+        # 均价线 (黄色/橙色)
+        self.avg_curve = None
+        if show_avg:
+            self.avg_curve = plot_item.plot(pen=pg.mkPen(color='#ffc107', width=avg_width), name="均价")
+
+        # 价格线 (涨红跌绿)
+        self.up_curve = plot_item.plot(pen=pg.mkPen(color=theme['COLOR_UP'], width=price_width))
+        self.down_curve = plot_item.plot(pen=pg.mkPen(color=theme['COLOR_DOWN'], width=price_width))
+
+        # 坐标轴只依赖市场类型，创建时设置一次
+        plot_item.getAxis('bottom').setTicks([get_axis_ticks(self.market)])
+        plot_item.setXRange(0, len(get_time_slots(self.market)))  # 固定 X 轴范围
+
+    def set_lines_visible(self, visible):
+        """显示/隐藏价格线和均价线（切换到 K 线时使用），昨收基准线不受影响"""
+        for item in (self.avg_curve, self.up_curve, self.down_curve):
+            if item is not None:
+                item.setVisible(visible)
+
+    def redraw(self, points, pre_close):
+        """整体重建：根据市场交易时间对齐坐标轴"""
+        series = align_points(points, self.code, pre_close)
+        self.series = series
+        self.y_range = None
+        if series.is_empty:
+            return
+
+        if pre_close > 0:
+            self.base_line.setPos(pre_close)
+            self.base_line.setVisible(True)
+        else:
+            self.base_line.setVisible(False)
+
+        size = len(series.price)
+        self._seg_up = np.zeros(size, dtype=np.uint8)
+        self._seg_down = np.zeros(size, dtype=np.uint8)
+        self._update_segments(series.first, series.last)
+        self._update_curves()
+        self._fit_y_range(series.first, series.last)
+
+    def update(self, points, pre_close):
+        """
+        增量更新：最后一根就地更新，新分钟追加，更早的数据不变。
+        无法增量合并时（首次、换日、昨收变化）退回整体重建。
+        返回: 数据是否有变化
+        """
+        series = self.series
+        start = None
+        if series is not None and series.pre_close == pre_close:
+            start = series.merge_points(points)
+        if start is None:
+            self.redraw(points, pre_close)
+            return True
+        if start < 0:
+            return False
+        self._update_segments(start - 1, series.last)
+        self._update_curves()
+        self._fit_y_range(start, series.last)
+        return True
+
+    def _update_segments(self, start, end):
+        """
+        重新计算 [start, end] 槽位内各段的颜色
+        每一段的颜色由终点相对昨收的位置决定 (最常见做法)
+        connect[i] 表示是否连接第 i 与 i+1 个点
+        """
+        series = self.series
+        start = max(start, series.first)
+        seg = series.price[start + 1:end + 1] >= series.pre_close
+        self._seg_up[start:end] = seg
+        self._seg_down[start:end] = ~seg
+        self._seg_up[end] = 0
+        self._seg_down[end] = 0
+
+    def _update_curves(self):
+        series = self.series
+        x = series.x
+        valid = slice(series.first, series.last + 1)
+        prices = series.price[valid]
+        if self.avg_curve is not None:
+            self.avg_curve.setData(x, series.avg_price[valid])
+        self.up_curve.setData(x, prices, connect=self._seg_up[valid])
+        self.down_curve.setData(x, prices, connect=self._seg_down[valid])
+
+    def _fit_y_range(self, start, end):
+        """新价格仍在当前 Y 范围内时不做任何调整，超出时才按全部数据重新计算"""
+        series = self.series
+        if self.y_range is not None:
+            new_prices = series.price[start:end + 1]
+            low, high = self.y_range
+            if np.nanmin(new_prices) >= low and np.nanmax(new_prices) <= high:
+                return
+
+        prices = series.valid("price")
+        pre_close = series.pre_close
+        low = float(np.nanmin(prices))
+        high = float(np.nanmax(prices))
+        if pre_close > 0:
+            low = min(low, pre_close)
+            high = max(high, pre_close)
+        if low == high:
+            margin = low * 0.01
+        else:
+            margin = (high - low) * 0.1
+        self.y_range = (low - margin, high + margin)
+        self.plot_item.setYRange(*self.y_range, padding=0)
+
+
+class CandlestickItem(pg.GraphicsObject):
+    """
+    K 线绘图项：K 线画在它覆盖的分钟槽位中间，与分时图共用同一条时间轴。
+    一天最多几十根 K 线，每次 setData 重新录制一个 QPicture，paint 时直接回放。
+    """
+
+    def __init__(self, theme):
+        super().__init__()
+        self._up_pen = pg.mkPen(theme['COLOR_UP'], width=1)
+        self._down_pen = pg.mkPen(theme['COLOR_DOWN'], width=1)
+        self._up_brush = pg.mkBrush(theme['COLOR_UP'])
+        self._down_brush = pg.mkBrush(theme['COLOR_DOWN'])
+        self._picture = QPicture()
+        self._bounds = QRectF()
+
+    def setData(self, bars):
+        """bars: core.bars.OHLCVBars"""
+        self.prepareGeometryChange()
+        self._picture = QPicture()
+        self._bounds = QRectF()
+        if not bars.is_empty:
+            self._record(bars)
+        self.update()
+
+    def _record(self, bars):
+        valid = slice(bars.first, bars.last + 1)
+        starts = bars.starts[valid]
+        ends = bars.ends[valid]
+        centers = (starts + ends) / 2
+        half_widths = (ends - starts + 1) * 0.35
+        opens, highs = bars.open[valid], bars.high[valid]
+        lows, closes = bars.low[valid], bars.close[valid]
+
+        painter = QPainter(self._picture)
+        for x, w, o, h, l, c in zip(centers, half_widths, opens, highs, lows, closes):
+            if c >= o:
+                painter.setPen(self._up_pen)
+                painter.setBrush(self._up_brush)
+            else:
+                painter.setPen(self._down_pen)
+                painter.setBrush(self._down_brush)
+            painter.drawLine(QPointF(x, l), QPointF(x, h))
+            painter.drawRect(QRectF(x - w, o, w * 2, c - o))
+        painter.end()
+
+        self._bounds = QRectF(float(starts[0]), float(lows.min()),
+                              float(ends[-1] - starts[0] + 1), float(highs.max() - lows.min()))
+
+    def paint(self, painter, *args):
+        painter.drawPicture(0, 0, self._picture)
+
+    def boundingRect(self):
+        return self._bounds
@@ -4,20 +4,29 @@ from PySide6.QtWidgets import (
     QMenu, QApplication, QAbstractItemView, QFrame, QMessageBox,
     QLineEdit
 )
-from PySide6.QtCore import Qt, Signal, Slot, QTimer, QSize
+from PySide6.QtCore import Qt, Signal, Slot, QTimer, QSize, QEvent
 from PySide6.QtGui import QIcon, QAction, QColor
 from datetime import datetime
 from ui.styles import COLOR_UP, COLOR_DOWN, COLOR_FLAT
 
 from ui.sparkline_widget import SparklineWidget
 from ui.chart_dialog import ChartDialog
+from ui.alert_dialog import AlertDialog
+from ui.dialog_pool import DialogPool
+from ui.chart_grid_window import ChartGridWindow
+from ui.compare_window import CompareWindow
 from ui.settings_dialog import SettingsDialog
 from core.theme_manager import ThemeManager
+from core.indicators import describe
 
 class MainWindow(QMainWindow):
     settings_changed = Signal()
     switch_to_mini = Signal()
 
+    MOVERS_COUNT = 5
+    CHART_POOL_SIZE = 5
+    ALERT_POOL_SIZE = 3
+
     def __init__(self, controller):
         super().__init__()
         self.controller = controller
@@ -133,6 +142,20 @@ class MainWindow(QMainWindow):
         
         table_layout.addWidget(self.table)
         layout.addWidget(table_frame)
+
+        # --- Movers Panel (异动榜) ---
+        self.movers_frame = QFrame()
+        movers_layout = QHBoxLayout(self.movers_frame)
+        movers_layout.setContentsMargins(15, 8, 15, 0)
+        self.movers_labels = {}
+        for key, title in (("gainers", "🔺 涨幅榜"), ("losers", "🔻 跌幅榜"), ("spikes", "📦 量能异动")):
+            lbl = QLabel(f"{title}\n--")
+            lbl.setProperty("class", "text-secondary")
+            lbl.setAlignment(Qt.AlignLeft | Qt.AlignTop)
+            movers_layout.addWidget(lbl, 1)
+            self.movers_labels[key] = (title, lbl)
+        self.movers_frame.setVisible(False)
+        layout.addWidget(self.movers_frame)
         
         # --- Footer ---
         footer_layout = QHBoxLayout()
@@ -150,6 +173,22 @@ class MainWindow(QMainWindow):
 
         footer_layout.addStretch()
         
+        # 多图网格
+        btn_grid = QPushButton("🔲 多图")
+        btn_grid.clicked.connect(self._open_chart_grid)
+        footer_layout.addWidget(btn_grid)
+
+        # 叠加对比
+        btn_compare = QPushButton("📈 对比")
+        btn_compare.clicked.connect(self._open_compare)
+        footer_layout.addWidget(btn_compare)
+
+        # 异动榜开关
+        self.btn_movers = QPushButton("🏆 异动榜")
+        self.btn_movers.setCheckable(True)
+        self.btn_movers.toggled.connect(self._on_movers_toggled)
+        footer_layout.addWidget(self.btn_movers)
+
         # 暂停按钮
         self.btn_pause = QPushButton("⏸ 暂停")
         self.btn_pause.setCheckable(True)
@@ -164,16 +203,27 @@ class MainWindow(QMainWindow):
         
         layout.addLayout(footer_layout)
         
-        # 连接信号
-        self.controller.stock_data_updated.connect(self.update_table)
+        # 连接信号（行情信号在窗口显示时才订阅）
         self.table.cellDoubleClicked.connect(self._on_table_double_click)
         self._init_table_rows()
         
         # 更新定时器
         self._update_timer = QTimer()
         self._update_timer.timeout.connect(self._update_status_time)
-        self._update_timer.start(1000)
         self._last_update_time = None
+        self._is_active = False
+
+        # 对话框按股票代码复用，LRU 上限 + 空闲回收
+        self._chart_pool = DialogPool(
+            lambda code, name: ChartDialog(self.controller, code, name, self),
+            capacity=self.CHART_POOL_SIZE, parent=self
+        )
+        self._chart_grid = None
+        self._compare_window = None
+        self._alert_pool = DialogPool(
+            lambda code, name: AlertDialog(self.controller, code, name, self),
+            capacity=self.ALERT_POOL_SIZE, parent=self
+        )
 
     def apply_theme(self, theme):
         self.setStyleSheet(self.theme_manager.get_style())
@@ -243,6 +293,24 @@ class MainWindow(QMainWindow):
         self.btn_refresh.setText("🔄 立即刷新")
         self.btn_refresh.setEnabled(True)
 
+    def _on_movers_toggled(self, checked):
+        self.movers_frame.setVisible(checked)
+        if checked:
+            self._update_movers_panel()
+
+    def _update_movers_panel(self):
+        """从控制器的增量排名读取异动榜，不在 UI 侧排序"""
+        movers = self.controller.movers
+        n = self.MOVERS_COUNT
+        sections = {
+            "gainers": [f"{name}  {score:+.2f}%" for _, name, score in movers.top_gainers(n)],
+            "losers": [f"{name}  {score:+.2f}%" for _, name, score in movers.top_losers(n)],
+            "spikes": [f"{name}  量比 {score:.1f}" for _, name, score in movers.volume_spikes(n)],
+        }
+        for key, rows in sections.items():
+            title, lbl = self.movers_labels[key]
+            lbl.setText("\n".join([title] + (rows or ["--"])))
+
     def _on_pause_click(self):
         is_paused = self.controller.toggle_pause()
         if is_paused:
@@ -384,9 +452,27 @@ class MainWindow(QMainWindow):
                     name = name_item.text()
                 break
         
-        dialog = AlertDialog(self.controller, code, name, self)
+        dialog, reused = self._alert_pool.get(code, name)
+        if reused:
+            dialog.refresh_from_store()
         dialog.exec()
 
+    def _open_chart_grid(self):
+        """打开多图网格窗口（单例，关闭时仅隐藏）"""
+        if self._chart_grid is None:
+            self._chart_grid = ChartGridWindow(self.controller, self)
+        self._chart_grid.show()
+        self._chart_grid.raise_()
+        self._chart_grid.activateWindow()
+
+    def _open_compare(self):
+        """打开叠加对比窗口（单例，关闭时仅隐藏）"""
+        if self._compare_window is None:
+            self._compare_window = CompareWindow(self.controller, self)
+        self._compare_window.show()
+        self._compare_window.raise_()
+        self._compare_window.activateWindow()
+
     def _on_table_double_click(self, row, column):
         """双击表格行打开分时图"""
         # 忽略操作列的双击
@@ -401,8 +487,12 @@ class MainWindow(QMainWindow):
         name_item = self.table.item(row, 1)
         name = name_item.text() if name_item else code
         
-        dialog = ChartDialog(self.controller, code, name, self)
-        dialog.exec()
+        dialog, reused = self._chart_pool.get(code, name)
+        if reused:
+            dialog.refresh_from_store()
+        dialog.show()
+        dialog.raise_()
+        dialog.activateWindow()
 
     @Slot()
     def on_test_click(self):
@@ -411,8 +501,7 @@ class MainWindow(QMainWindow):
             return
         
         # 检查是否已存在
-        existing = self.controller.get_stocks_list()
-        if code in existing:
+        if code in self.controller.get_watchlist():
             self.test_result_label.setText(f"⚠ {code} 已在监控列表中")
             self.test_result_label.setProperty("class", "status-warn") # Will define this or use style
             self.test_result_label.setStyleSheet(f"color: {self.theme_manager.get_current_theme()['STATUS_WARN']}; font-size: 11px;")
@@ -458,6 +547,8 @@ class MainWindow(QMainWindow):
         )
         if ret == QMessageBox.Yes:
             self.controller.remove_stock(code)
+            self._chart_pool.remove(code)
+            self._alert_pool.remove(code)
             self._init_table_rows()
 
     @Slot(int)
@@ -481,7 +572,10 @@ class MainWindow(QMainWindow):
             
             if code in data:
                 info = data[code]
-                self.table.item(row, 1).setText(info['name'])
+                name_item = self.table.item(row, 1)
+                name_item.setText(info['name'])
+                # 悬停名称显示流式指标
+                name_item.setToolTip(describe(self.controller.indicators.get(code)))
                 
                 # 更新走势图
                 sparkline = self.table.cellWidget(row, 2)
@@ -536,6 +630,43 @@ class MainWindow(QMainWindow):
 
         self.table.setSortingEnabled(True)
 
+        if self.movers_frame.isVisible():
+            self._update_movers_panel()
+
+    def _set_active(self, active):
+        """
+        窗口可见时订阅行情并启动定时器，隐藏/最小化时全部停止。
+        恢复可见时用控制器的最新快照补一次渲染。
+        """
+        if active == self._is_active:
+            return
+        self._is_active = active
+        self.controller.set_view_active("main", active)
+
+        if active:
+            self.controller.stock_data_updated.connect(self.update_table)
+            self._update_timer.start(1000)
+            if self.controller.latest_data:
+                self.update_table(self.controller.latest_data)
+                self._last_update_time = self.controller.last_update_time
+                self._update_status_time()
+        else:
+            self.controller.stock_data_updated.disconnect(self.update_table)
+            self._update_timer.stop()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._set_active(not self.isMinimized())
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self._set_active(False)
+
+    def changeEvent(self, event):
+        if event.type() == QEvent.WindowStateChange:
+            self._set_active(self.isVisible() and not self.isMinimized())
+        super().changeEvent(event)
+
     def closeEvent(self, event):
         # 保存窗口位置
         self.controller.config.update_window_settings("expanded_pos", [self.x(), self.y()])
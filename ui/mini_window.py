@@ -4,11 +4,14 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Qt, Signal, QPoint, QTimer, QPropertyAnimation, QEasingCurve, Property
 from PySide6.QtGui import QCursor, QAction, QColor, QFont, QPainter, QBrush, QPen, QLinearGradient
+from ui.ticker_widget import TickerWidget
 
 class MiniWindow(QWidget):
     switch_to_expanded = Signal()
     close_app = Signal()
 
+    MOVERS_COUNT = 5
+
     def __init__(self, controller):
         super().__init__()
         self.controller = controller
@@ -54,23 +57,50 @@ class MiniWindow(QWidget):
         self._bg_opacity = 0.0
         self._show_ratio = True 
         self._cached_data = {} 
+        # 自绘模式：整个行情区由一个 TickerWidget 绘制
+        self._painted = bool(self.controller.config.get_window_settings().get("mini_painted", False))
+        self.ticker = None
+        if self._painted:
+            self._create_ticker()
+
+        # 分页轮播：每页显示 N 行，定时翻页，只格式化当前页
+        window_settings = self.controller.config.get_window_settings()
+        self._page_size = int(window_settings.get("mini_page_size", 0))
+        self._page_interval = int(window_settings.get("mini_page_interval", 5))
+        self._page = 0
+        self._page_count = 1
+        self._page_timer = QTimer()
+        self._page_timer.timeout.connect(self._next_page)
+
+        # 显示内容：watchlist 按自选顺序 / movers 显示涨跌幅榜
+        self._view = window_settings.get("mini_view", "watchlist")
         
         # 动画
         self._opacity_animation = QPropertyAnimation(self, b"bgOpacity")
         self._opacity_animation.setDuration(200)
         self._opacity_animation.setEasingCurve(QEasingCurve.InOutQuad)
 
-        # Connect
-        self.controller.stock_data_updated.connect(self.update_data)
-        
-        # 刷新状态定时器
+        # 刷新状态定时器（行情信号和定时器都在窗口显示时才启用）
         self._last_update_time = None
         self._status_timer = QTimer()
         self._status_timer.timeout.connect(self._update_status_text)
-        self._status_timer.start(1000)
+        self._is_active = False
+
+    def _create_ticker(self):
+        self.ticker = TickerWidget()
+        self.ticker.set_shadow_color(self.theme.get("MINI_TEXT_SHADOW", "#000000"))
+        self.content_layout.addWidget(self.ticker)
+
+    def _clear_labels(self):
+        for lbl in self.labels.values():
+            self.content_layout.removeWidget(lbl)
+            lbl.deleteLater()
+        self.labels = {}
 
     def update_theme(self, theme):
         self.theme = theme
+        if self.ticker:
+            self.ticker.set_shadow_color(theme.get("MINI_TEXT_SHADOW", "#000000"))
         self.update() # Repaint background
         if self._cached_data:
             self._render_data(self._cached_data)
@@ -154,14 +184,15 @@ class MiniWindow(QWidget):
 
     def _update_status_text(self):
         """更新状态文本，显示距离上次刷新的时间"""
+        page_hint = f"  {self._page + 1}/{self._page_count}" if self._page_count > 1 else ""
         if self._last_update_time:
             from datetime import datetime
             now = datetime.now()
             delta = (now - self._last_update_time).total_seconds()
             if delta < 60:
-                self.status_label.setText(f"⟳ {int(delta)}秒前")
+                self.status_label.setText(f"⟳ {int(delta)}秒前{page_hint}")
             else:
-                self.status_label.setText(f"⟳ {int(delta/60)}分钟前")
+                self.status_label.setText(f"⟳ {int(delta/60)}分钟前{page_hint}")
         else:
             self.status_label.setText("⟳ 等待数据...")
 
@@ -173,9 +204,23 @@ class MiniWindow(QWidget):
     
     def _render_data(self, data):
         """渲染股票数据"""
-        # 按配置的顺序获取股票列表
-        stock_order = self.controller.get_stocks_list()
-        current_codes = set(data.keys())
+        if self._view == "movers":
+            # 异动榜：涨幅前 N + 跌幅前 N
+            movers = self.controller.movers
+            n = self.MOVERS_COUNT
+            stock_order = [c for c, _, _ in movers.top_gainers(n) + movers.top_losers(n)]
+        else:
+            # 按配置的顺序获取股票列表
+            stock_order = self.controller.get_stocks_list()
+        sorted_codes = self._visible_codes([c for c in stock_order if c in data])
+
+        if self._painted:
+            lines = [(code, *self._format_line(code, data[code])) for code in sorted_codes]
+            if self.ticker.set_lines(lines):
+                self.adjustSize()
+            return
+
+        current_codes = set(sorted_codes)
         existing_codes = set(self.labels.keys())
 
         # 清理已移除的
@@ -184,65 +229,8 @@ class MiniWindow(QWidget):
             self.labels[code].deleteLater()
             del self.labels[code]
 
-        # 按配置的顺序排列
-        sorted_codes = [c for c in stock_order if c in data]
-        
-        for code in sorted_codes:
-            info = data[code]
-            
-            # 计算涨跌颜色和符号
-            try:
-                if '%' in info['ratio']:
-                    ratio_val = float(info['ratio'].replace('%', ''))
-                else:
-                    ratio_val = 0.0
-            except:
-                ratio_val = 0.0
-
-            if ratio_val > 0:
-                color = self.theme.get("COLOR_UP", "#FF6B6B")
-                symbol = "▲"
-            elif ratio_val < 0:
-                color = self.theme.get("COLOR_DOWN", "#4ECDC4")
-                symbol = "▼"
-            else:
-                color = self.theme.get("COLOR_FLAT", "#F7F7F7")
-                symbol = "●"
-
-            # 识别市场类型
-            market_prefix = self._get_market_prefix(code)
-            
-            # 根据显示模式选择显示涨跌幅还是涨跌额
-            if self._show_ratio:
-                change_display = info['ratio']
-            else:
-                increase = info.get('increase', '--')
-                change_display = str(increase)
-            
-            # 格式: [市场] 名称 价格 涨跌幅/涨跌额 符号
-            name_display = f"{market_prefix}{info['name']}" if market_prefix else info['name']
-            display_text = f"{name_display}  {info['price']}  {change_display} {symbol}"
-            
-            # 丰富的悬停提示
-            high = info.get('high', '--')
-            low = info.get('low', '--')
-            open_price = info.get('open', '--')
-            increase = info.get('increase', '--')
-            
-            mode_hint = "涨跌幅" if self._show_ratio else "涨跌额"
-            tooltip = (
-                f"📊 {info['name']} ({code})\n"
-                f"━━━━━━━━━━━━━━\n"
-                f"💰 现价: {info['price']}\n"
-                f"📈 涨跌幅: {info['ratio']}\n"
-                f"📉 涨跌额: {increase}\n"
-                f"📊 今开: {open_price}\n"
-                f"🔺 最高: {high}\n"
-                f"🔻 最低: {low}\n"
-                f"📦 成交量: {info['volume']}\n"
-                f"━━━━━━━━━━━━━━\n"
-                f"💡 双击展开 | 右键切换{mode_hint}"
-            )
+        for index, code in enumerate(sorted_codes):
+            display_text, color, tooltip = self._format_line(code, data[code])
 
             if code not in self.labels:
                 lbl = QLabel(display_text)
@@ -257,8 +245,11 @@ class MiniWindow(QWidget):
                 self.content_layout.addWidget(lbl)
                 self.labels[code] = lbl
             
-            # 更新标签
+            # 更新标签，并保证标签顺序与显示顺序一致
             lbl = self.labels[code]
+            if self.content_layout.indexOf(lbl) != index:
+                self.content_layout.removeWidget(lbl)
+                self.content_layout.insertWidget(index, lbl)
             lbl.setText(display_text)
             lbl.setToolTip(tooltip)
             
@@ -274,6 +265,106 @@ class MiniWindow(QWidget):
 
         self.adjustSize()
 
+    def _visible_codes(self, codes):
+        """分页模式下只返回当前页的股票，其余股票不参与格式化和渲染"""
+        if self._page_size <= 0 or len(codes) <= self._page_size:
+            self._page = 0
+            self._page_count = 1
+            self._page_timer.stop()
+            return codes
+
+        self._page_count = (len(codes) + self._page_size - 1) // self._page_size
+        if self._page >= self._page_count:
+            self._page = 0
+        if not self._page_timer.isActive():
+            self._page_timer.start(self._page_interval * 1000)
+
+        start = self._page * self._page_size
+        return codes[start:start + self._page_size]
+
+    def _next_page(self):
+        """翻到下一页，使用缓存数据重新渲染"""
+        if self._page_count <= 1:
+            self._page_timer.stop()
+            return
+        self._page = (self._page + 1) % self._page_count
+        if self._cached_data:
+            self._render_data(self._cached_data)
+        self._update_status_text()
+
+    def set_page_size(self, size):
+        """设置每页行数，0 表示不分页"""
+        self._page_size = max(0, int(size))
+        self._page = 0
+        self.controller.config.update_window_settings("mini_page_size", self._page_size)
+        if not self._painted:
+            # 标签模式下行数变化较大，直接重建
+            self._clear_labels()
+        if self._cached_data:
+            self._render_data(self._cached_data)
+        self._update_status_text()
+        self.adjustSize()
+
+    def _format_line(self, code, info):
+        """
+        生成单只股票的显示内容
+        返回: (显示文本, 颜色, 悬停提示)
+        """
+        # 计算涨跌颜色和符号
+        try:
+            if '%' in info['ratio']:
+                ratio_val = float(info['ratio'].replace('%', ''))
+            else:
+                ratio_val = 0.0
+        except:
+            ratio_val = 0.0
+
+        if ratio_val > 0:
+            color = self.theme.get("COLOR_UP", "#FF6B6B")
+            symbol = "▲"
+        elif ratio_val < 0:
+            color = self.theme.get("COLOR_DOWN", "#4ECDC4")
+            symbol = "▼"
+        else:
+            color = self.theme.get("COLOR_FLAT", "#F7F7F7")
+            symbol = "●"
+
+        # 识别市场类型
+        market_prefix = self._get_market_prefix(code)
+        
+        # 根据显示模式选择显示涨跌幅还是涨跌额
+        if self._show_ratio:
+            change_display = info['ratio']
+        else:
+            increase = info.get('increase', '--')
+            change_display = str(increase)
+        
+        # 格式: [市场] 名称 价格 涨跌幅/涨跌额 符号
+        name_display = f"{market_prefix}{info['name']}" if market_prefix else info['name']
+        display_text = f"{name_display}  {info['price']}  {change_display} {symbol}"
+        
+        # 丰富的悬停提示
+        high = info.get('high', '--')
+        low = info.get('low', '--')
+        open_price = info.get('open', '--')
+        increase = info.get('increase', '--')
+        
+        mode_hint = "涨跌幅" if self._show_ratio else "涨跌额"
+        tooltip = (
+            f"📊 {info['name']} ({code})\n"
+            f"━━━━━━━━━━━━━━\n"
+            f"💰 现价: {info['price']}\n"
+            f"📈 涨跌幅: {info['ratio']}\n"
+            f"📉 涨跌额: {increase}\n"
+            f"📊 今开: {open_price}\n"
+            f"🔺 最高: {high}\n"
+            f"🔻 最低: {low}\n"
+            f"📦 成交量: {info['volume']}\n"
+            f"━━━━━━━━━━━━━━\n"
+            f"💡 双击展开 | 右键切换{mode_hint}"
+        )
+        return display_text, color, tooltip
+
     # --- Interaction ---
     def mousePressEvent(self, event):
         if self.is_locked: 
@@ -333,6 +424,29 @@ class MiniWindow(QWidget):
         toggle_action = QAction(toggle_text, self)
         toggle_action.triggered.connect(self._toggle_display_mode)
         menu.addAction(toggle_action)
+
+        # 自绘模式（低 CPU 占用）
+        painted_action = QAction("🎨 轻量绘制模式", self)
+        painted_action.setCheckable(True)
+        painted_action.setChecked(self._painted)
+        painted_action.triggered.connect(self._toggle_painted_mode)
+        menu.addAction(painted_action)
+
+        # 异动榜
+        movers_action = QAction("🏆 显示异动榜", self)
+        movers_action.setCheckable(True)
+        movers_action.setChecked(self._view == "movers")
+        movers_action.triggered.connect(self._toggle_movers_view)
+        menu.addAction(movers_action)
+
+        # 分页轮播
+        page_menu = menu.addMenu("📄 分页显示")
+        for size, text in ((0, "不分页"), (5, "每页 5 只"), (10, "每页 10 只"), (20, "每页 20 只")):
+            page_action = QAction(text, self)
+            page_action.setCheckable(True)
+            page_action.setChecked(self._page_size == size)
+            page_action.triggered.connect(lambda checked=False, s=size: self.set_page_size(s))
+            page_menu.addAction(page_action)
         
         menu.addSeparator()
         
@@ -377,11 +491,58 @@ class MiniWindow(QWidget):
         if self._cached_data:
             self._render_data(self._cached_data)
 
+    def _toggle_painted_mode(self):
+        """切换 QLabel 模式 / 单控件自绘模式"""
+        self._painted = not self._painted
+        self.controller.config.update_window_settings("mini_painted", self._painted)
+        if self._painted:
+            self._clear_labels()
+            self._create_ticker()
+        else:
+            self.content_layout.removeWidget(self.ticker)
+            self.ticker.deleteLater()
+            self.ticker = None
+        if self._cached_data:
+            self._render_data(self._cached_data)
+        self.adjustSize()
+
+    def _toggle_movers_view(self):
+        """切换自选列表 / 异动榜"""
+        self._view = "watchlist" if self._view == "movers" else "movers"
+        self._page = 0
+        self.controller.config.update_window_settings("mini_view", self._view)
+        if self._cached_data:
+            self._render_data(self._cached_data)
+
+    def _set_active(self, active):
+        """可见时订阅行情并启动定时器；隐藏时全部停止，恢复时用最新快照补一次渲染"""
+        if active == self._is_active:
+            return
+        self._is_active = active
+        self.controller.set_view_active("mini", active)
+
+        if active:
+            self.controller.stock_data_updated.connect(self.update_data)
+            self._status_timer.start(1000)
+            if self.controller.latest_data:
+                self.update_data(self.controller.latest_data)
+                self._last_update_time = self.controller.last_update_time
+            self._update_status_text()
+        else:
+            self.controller.stock_data_updated.disconnect(self.update_data)
+            self._status_timer.stop()
+            self._page_timer.stop()
+
     def showEvent(self, event):
         # 恢复位置
         pos = self.controller.config.get_window_settings().get("mini_pos", [100, 100])
         self.move(int(pos[0]), int(pos[1]))
         super().showEvent(event)
+        self._set_active(True)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self._set_active(False)
 
     def _get_market_prefix(self, code: str) -> str:
         """
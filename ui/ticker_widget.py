@@ -0,0 +1,203 @@
+"""
+迷你悬浮窗的自绘行情条
+"""
+from PySide6.QtWidgets import (
+    QWidget, QToolTip, QGraphicsScene, QGraphicsPixmapItem, QGraphicsBlurEffect
+)
+from PySide6.QtCore import Qt, QSize, QPointF, QRectF, QEvent
+from PySide6.QtGui import (
+    QPainter, QColor, QFont, QFontMetrics, QStaticText, QTransform, QImage, QPixmap
+)
+
+
+SHADOW_BLUR_RADIUS = 12
+SHADOW_OFFSET = QPointF(1, 1)
+
+
+def _blur_image(image: QImage, radius: float) -> QImage:
+    """对图像做一次高斯模糊（借助 QGraphicsBlurEffect 离屏渲染）"""
+    scene = QGraphicsScene()
+    item = QGraphicsPixmapItem(QPixmap.fromImage(image))
+    effect = QGraphicsBlurEffect()
+    effect.setBlurRadius(radius)
+    effect.setBlurHints(QGraphicsBlurEffect.QualityHint)
+    item.setGraphicsEffect(effect)
+    scene.addItem(item)
+
+    result = QImage(image.size(), QImage.Format_ARGB32_Premultiplied)
+    result.fill(Qt.transparent)
+    painter = QPainter(result)
+    scene.render(painter, QRectF(result.rect()), QRectF(image.rect()))
+    painter.end()
+    return result
+
+
+class _TickerLine:
+    """单行缓存：QStaticText + 预渲染阴影"""
+
+    __slots__ = ("key", "text", "color", "tooltip", "static", "shadow")
+
+    def __init__(self, key):
+        self.key = key
+        self.text = None
+        self.color = QColor()
+        self.tooltip = ""
+        self.static = QStaticText()
+        self.static.setTextFormat(Qt.PlainText)
+        self.shadow = None
+
+
+class TickerWidget(QWidget):
+    """
+    单控件绘制全部股票行，替代每只股票一个 QLabel + 阴影特效的做法。
+    只有文本发生变化的行才会重新排版并重新生成阴影，颜色变化仅触发重绘；
+    内容、颜色和顺序都没变时不重绘。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_TranslucentBackground)
+        self.setMouseTracking(True)
+
+        self._font = QFont()
+        self._font.setFamilies(["Segoe UI", "Microsoft YaHei", "sans-serif"])
+        self._font.setPointSize(13)
+        self._font.setBold(True)
+        self._metrics = QFontMetrics(self._font)
+
+        self._padding_x = 4
+        self._padding_y = 2
+        self._spacing = 3
+        self._line_height = self._metrics.height() + self._padding_y * 2
+
+        self._shadow_color = QColor("#000000")
+        self._lines = []  # 按显示顺序排列的 _TickerLine
+        self._cache = {}  # key -> _TickerLine
+        self._size = QSize(0, 0)
+
+    def set_shadow_color(self, color):
+        """主题切换时更新阴影颜色，阴影需全部重新生成"""
+        color = QColor(color)
+        if color == self._shadow_color:
+            return
+        self._shadow_color = color
+        for line in self._cache.values():
+            line.shadow = None
+        self.update()
+
+    def set_lines(self, lines) -> bool:
+        """
+        设置显示内容
+        lines: [(key, text, color, tooltip), ...]
+        返回: 控件尺寸是否发生变化（调用方据此决定是否 adjustSize）
+        """
+        ordered = []
+        changed = False  # 文本、颜色或顺序有变化时才重绘
+        for key, text, color, tooltip in lines:
+            line = self._cache.get(key)
+            if line is None:
+                line = _TickerLine(key)
+                self._cache[key] = line
+            if line.text != text:
+                line.text = text
+                line.static.setText(text)
+                line.static.prepare(QTransform(), self._font)
+                line.shadow = None
+                changed = True
+            color = QColor(color)
+            if line.color != color:
+                line.color = color
+                changed = True
+            line.tooltip = tooltip
+            ordered.append(line)
+
+        if len(ordered) != len(self._lines) or any(a is not b for a, b in zip(ordered, self._lines)):
+            changed = True
+            # 清理不再显示的行
+            keep = {line.key for line in ordered}
+            for key in [k for k in self._cache if k not in keep]:
+                del self._cache[key]
+            self._lines = ordered
+
+        if not changed:
+            return False
+        self.update()
+        return self._update_size()
+
+    def _update_size(self) -> bool:
+        width = 0
+        for line in self._lines:
+            width = max(width, int(line.static.size().width()))
+        count = len(self._lines)
+        height = count * self._line_height + max(0, count - 1) * self._spacing
+        size = QSize(width + self._padding_x * 2 + SHADOW_BLUR_RADIUS // 2, height)
+        if size == self._size:
+            return False
+        self._size = size
+        self.setFixedSize(size)
+        self.updateGeometry()
+        return True
+
+    def sizeHint(self):
+        return self._size
+
+    def _render_shadow(self, line: _TickerLine) -> QPixmap:
+        """把文本以阴影色绘制到离屏图像并模糊，结果缓存到行上"""
+        dpr = self.devicePixelRatioF()
+        text_size = line.static.size()
+        margin = SHADOW_BLUR_RADIUS
+        w = int((text_size.width() + margin * 2) * dpr)
+        h = int((text_size.height() + margin * 2) * dpr)
+
+        image = QImage(max(w, 1), max(h, 1), QImage.Format_ARGB32_Premultiplied)
+        image.fill(Qt.transparent)
+        painter = QPainter(image)
+        painter.scale(dpr, dpr)
+        painter.setFont(self._font)
+        painter.setPen(self._shadow_color)
+        painter.drawStaticText(QPointF(margin, margin), line.static)
+        painter.end()
+
+        pixmap = QPixmap.fromImage(_blur_image(image, SHADOW_BLUR_RADIUS * dpr))
+        pixmap.setDevicePixelRatio(dpr)
+        return pixmap
+
+    def _line_at(self, y):
+        step = self._line_height + self._spacing
+        index = int(y // step)
+        if 0 <= index < len(self._lines) and y - index * step <= self._line_height:
+            return self._lines[index]
+        return None
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.TextAntialiasing)
+        painter.setFont(self._font)
+
+        step = self._line_height + self._spacing
+        for i, line in enumerate(self._lines):
+            top = i * step
+            if top > event.rect().bottom() or top + self._line_height < event.rect().top():
+                continue
+            pos = QPointF(self._padding_x, top + self._padding_y)
+
+            if line.shadow is None:
+                line.shadow = self._render_shadow(line)
+            painter.drawPixmap(
+                pos + SHADOW_OFFSET - QPointF(SHADOW_BLUR_RADIUS, SHADOW_BLUR_RADIUS),
+                line.shadow
+            )
+
+            painter.setPen(line.color)
+            painter.drawStaticText(pos, line.static)
+
+    def event(self, event):
+        if event.type() == QEvent.ToolTip:
+            line = self._line_at(event.pos().y())
+            if line and line.tooltip:
+                QToolTip.showText(event.globalPos(), line.tooltip, self)
+            else:
+                QToolTip.hideText()
+                event.ignore()
+            return True
+        return super().event(event)
@@ -0,0 +1,94 @@
+"""
+托盘摘要：仅托盘模式下把行情渲染到托盘提示和图标角标
+"""
+from PySide6.QtCore import QObject, Qt
+from PySide6.QtGui import QIcon, QPixmap, QPainter, QColor, QFont
+
+
+class TraySummary(QObject):
+    """
+    托盘提示显示自选股摘要，托盘图标显示涨跌幅绝对值最大的股票的涨跌幅。
+    角标图标按文本缓存，文本不变时不会重新绘制或重新设置图标。
+    """
+
+    MAX_LINES = 8
+
+    def __init__(self, controller, tray, default_icon: QIcon):
+        super().__init__()
+        self.controller = controller
+        self.tray = tray
+        self.default_icon = default_icon
+        self._enabled = False
+        self._icon_cache = {}  # (text, color) -> QIcon
+        self._icon_key = None
+        self._tooltip = ""
+
+    def set_enabled(self, enabled: bool):
+        if enabled == self._enabled:
+            return
+        self._enabled = enabled
+        if enabled:
+            self.controller.stock_data_updated.connect(self._on_data)
+            if self.controller.latest_data:
+                self._on_data(self.controller.latest_data)
+        else:
+            self.controller.stock_data_updated.disconnect(self._on_data)
+            self._icon_key = None
+            self._tooltip = ""
+            self.tray.setIcon(self.default_icon)
+            self.tray.setToolTip("股票监控助手")
+
+    def _on_data(self, data):
+        snapshot = self.controller.latest_data or data
+        codes = [c for c in self.controller.get_stocks_list() if c in snapshot]
+
+        lines = []
+        for code in codes[:self.MAX_LINES]:
+            info = snapshot[code]
+            lines.append(f"{info.get('name', code)}  {info.get('price', '--')}  {info.get('ratio', '--')}")
+        if len(codes) > self.MAX_LINES:
+            lines.append(f"... 共 {len(codes)} 只")
+        tooltip = "\n".join(lines) or "股票监控助手"
+        if tooltip != self._tooltip:
+            self._tooltip = tooltip
+            self.tray.setToolTip(tooltip)
+
+        # 角标：涨跌幅绝对值最大的股票
+        movers = self.controller.movers
+        candidates = movers.top_gainers(1) + movers.top_losers(1)
+        if not candidates:
+            return
+        _, _, ratio = max(candidates, key=lambda item: abs(item[2]))
+        self._set_badge(ratio)
+
+    def _set_badge(self, ratio: float):
+        theme = self.controller.theme_manager.get_current_theme()
+        color = theme["COLOR_UP"] if ratio > 0 else theme["COLOR_DOWN"] if ratio < 0 else theme["COLOR_FLAT"]
+        text = f"{abs(ratio):.0f}" if abs(ratio) >= 10 else f"{abs(ratio):.1f}"
+        key = (text, color)
+        if key == self._icon_key:
+            return
+        icon = self._icon_cache.get(key)
+        if icon is None:
+            icon = self._render_badge(text, color)
+            self._icon_cache[key] = icon
+        self._icon_key = key
+        self.tray.setIcon(icon)
+
+    @staticmethod
+    def _render_badge(text: str, color: str) -> QIcon:
+        pixmap = QPixmap(32, 32)
+        pixmap.fill(QColor(0, 0, 0, 0))
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(color))
+        painter.drawRoundedRect(0, 0, 32, 32, 6, 6)
+        font = QFont()
+        font.setBold(True)
+        font.setPixelSize(15 if len(text) <= 3 else 12)
+        painter.setFont(font)
+        painter.setPen(QColor("white"))
+        painter.drawText(pixmap.rect(), Qt.AlignCenter, text)
+        painter.end()
+        return QIcon(pixmap)